@@ -1,9 +1,34 @@
 __all__ = [
     "common",
+    "scanner",
     "time_axis",
     "spectra_matrix",
     "bg_fast",
     "bg_realtime",
+    "writers",
     "extract_core",
+    "follow",
+    "batch",
+    "index_cache",
+    "file_identify",
+    "header",
+    "profiling",
+    "pipeline",
+    "service",
+    "validate",
+    "archive",
+    "srs_file",
+    "synthetic",
+    "bench",
+    "SrsFile",
 ]
 
+
+def __getattr__(name):
+    # imported on first use, so importing one submodule does not load the whole package
+    if name == "SrsFile":
+        from .srs_file import SrsFile
+
+        return SrsFile
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
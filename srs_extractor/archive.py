@@ -0,0 +1,470 @@
+import argparse
+import itertools
+import json
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+from .common import map_srs
+from .writers import CHUNK_ROWS, RowStream, write_npy_arrays, write_text_batches
+
+ARCHIVE_MAGIC = b"SRSARC01"
+ARCHIVE_VERSION = 1
+# uncompressed bytes per chunk; sets the default frames per chunk
+ARCHIVE_CHUNK_BYTES = 1 << 20
+# zlib level: noisy float32 mantissas barely compress further at higher levels
+ARCHIVE_LEVEL = 1
+# applied in this order before zlib: frame-to-frame integer delta, then byte shuffle
+ARCHIVE_FILTERS = ("delta", "shuffle")
+# index position/length and the magic again, at the very end of the file
+_FOOTER = struct.Struct("<QQ8s")
+# text rows parsed per block by pack
+PACK_TEXT_ROWS = 16 * CHUNK_ROWS
+
+
+def archive_chunk_frames(npts: int) -> int:
+    return max(1, ARCHIVE_CHUNK_BYTES // (4 * max(npts, 1)))
+
+
+def encode_chunk(block: np.ndarray, filters: Sequence[str] = ARCHIVE_FILTERS, level: int = ARCHIVE_LEVEL) -> bytes:
+    """Compress a ``(frames, npts)`` float32 block losslessly.
+
+    ``delta`` replaces every frame by its difference to the previous frame in
+    the chunk (on the float bits, as uint32 with wrap-around), ``shuffle`` groups
+    byte 0 of every value, then byte 1, ...: consecutive spectra share sign,
+    exponent and high mantissa bits, so both leave long runs for zlib.
+    """
+    u = np.ascontiguousarray(block, dtype="<f4").view("<u4")
+    if "delta" in filters and len(u) > 1:
+        d = np.empty_like(u)
+        d[0] = u[0]
+        np.subtract(u[1:], u[:-1], out=d[1:])
+        u = d
+    raw = u.view(np.uint8)
+    if "shuffle" in filters:
+        raw = np.ascontiguousarray(raw.reshape(-1, 4).T)
+    return zlib.compress(raw, level)
+
+
+def decode_chunk(data: bytes, frames: int, npts: int, filters: Sequence[str] = ARCHIVE_FILTERS) -> np.ndarray:
+    """Inverse of ``encode_chunk``."""
+    raw = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    if "shuffle" in filters:
+        raw = np.ascontiguousarray(raw.reshape(4, -1).T)
+    else:
+        raw = raw.copy()
+    u = raw.view("<u4").reshape(frames, npts)
+    if "delta" in filters:
+        np.cumsum(u, axis=0, dtype=np.uint32, out=u)
+    return u.view("<f4").astype(np.float32, copy=False)
+
+
+def _rechunk(batches: Iterable[np.ndarray], chunk_frames: int) -> Iterator[np.ndarray]:
+    # re-split consecutive row blocks into chunks of exactly chunk_frames rows (last one shorter)
+    pending, held = [], 0
+    for block in batches:
+        block = np.asarray(block)
+        i = 0
+        if held:
+            take = min(chunk_frames - held, len(block))
+            pending.append(block[:take])
+            held += take
+            i = take
+            if held < chunk_frames:
+                continue
+            yield np.concatenate(pending)
+            pending, held = [], 0
+        # slice big blocks (e.g. a memory-mapped matrix) without copying them whole
+        while len(block) - i >= chunk_frames:
+            yield block[i : i + chunk_frames]
+            i += chunk_frames
+        if i < len(block):
+            pending, held = [block[i:]], len(block) - i
+    if held:
+        yield np.concatenate(pending)
+
+
+def _write_array(fh, arr: np.ndarray) -> Dict:
+    # 8-byte aligned so the reader can view it in place
+    fh.write(b"\0" * (-fh.tell() % 8))
+    arr = np.ascontiguousarray(arr)
+    arr = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+    entry = {"offset": fh.tell(), "dtype": arr.dtype.str, "shape": list(arr.shape)}
+    fh.write(arr.tobytes())
+    return entry
+
+
+def write_archive(
+    path: str,
+    spectra: Union[np.ndarray, RowStream, Iterable[np.ndarray]],
+    arrays: Optional[Dict[str, Optional[np.ndarray]]] = None,
+    chunk_frames: Optional[int] = None,
+    level: int = ARCHIVE_LEVEL,
+    filters: Sequence[str] = ARCHIVE_FILTERS,
+    workers: int = 0,
+    meta: Optional[Dict] = None,
+) -> Dict:
+    """Write ``spectra`` as zlib-compressed chunks of ``chunk_frames`` frames plus
+    uncompressed ``arrays`` (time, wavenumber, background, ...) into one file.
+
+    ``spectra`` may be a matrix, a ``RowStream`` or any iterable of row blocks;
+    it is consumed batch by batch, and ``arrays`` is only read afterwards (None
+    entries are skipped). Layout: magic, the compressed chunks, the arrays, the
+    chunk offset table, a JSON index and a fixed footer pointing at the index.
+    With ``workers > 0`` chunks are compressed on a thread pool (zlib releases
+    the GIL). An empty selection gives an archive with no chunks; its width is
+    taken from the ``RowStream`` shape or ``arrays["wavenumber"]``. Returns the index.
+    """
+    npts = None
+    if isinstance(spectra, RowStream):
+        batches, npts = spectra.batches, spectra.shape[1]
+    elif isinstance(spectra, np.ndarray):
+        batches = [spectra]
+    else:
+        batches = spectra
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is not None:
+        first = np.asarray(first)
+        npts = first.shape[1]
+    elif npts is None:
+        wn = (arrays or {}).get("wavenumber")
+        if wn is None:
+            raise ValueError("no spectra to archive and no wavenumber axis to size the archive")
+        npts = len(wn)
+    chunk_frames = chunk_frames or archive_chunk_frames(npts)
+    filters = list(filters)
+    offsets, n_frames = [], 0
+
+    with open(path, "wb") as fh:
+        fh.write(ARCHIVE_MAGIC)
+
+        def put(data: bytes):
+            offsets.append(fh.tell())
+            fh.write(data)
+
+        chunks = _rechunk(itertools.chain([first] if first is not None else [], batches), chunk_frames)
+        if workers <= 0:
+            for block in chunks:
+                n_frames += len(block)
+                put(encode_chunk(block, filters, level))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pending = []
+                for block in chunks:
+                    n_frames += len(block)
+                    pending.append(pool.submit(encode_chunk, np.array(block), filters, level))
+                    if len(pending) > 2 * workers:
+                        put(pending.pop(0).result())
+                for fut in pending:
+                    put(fut.result())
+        offsets.append(fh.tell())
+        index = {
+            "version": ARCHIVE_VERSION,
+            "shape": [n_frames, npts],
+            "dtype": "<f4",
+            "chunk_frames": chunk_frames,
+            "codec": "zlib",
+            "level": level,
+            "filters": filters,
+            "raw_bytes": 4 * n_frames * npts,
+            "compressed_bytes": offsets[-1] - offsets[0],
+            "arrays": {name: _write_array(fh, arr) for name, arr in (arrays or {}).items() if arr is not None},
+            "meta": meta or {},
+        }
+        index["chunks"] = _write_array(fh, np.asarray(offsets, dtype=np.int64))
+        pos = fh.tell()
+        blob = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        fh.write(blob)
+        fh.write(_FOOTER.pack(pos, len(blob), ARCHIVE_MAGIC))
+    return index
+
+
+class SrsArchive:
+    """Read-only access to an archive written by ``write_archive``.
+
+    Only the chunks covering the requested frames are decompressed; the most
+    recently decoded chunk is kept, so frame-by-frame reads decode each chunk
+    once. Indexing works like ``SrsFile.spectra``:
+
+        with SrsArchive("run.srsa") as a:
+            block = a[1000:2000]          # (1000, npts) float32
+            t = a.time[1000:2000]
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buf = map_srs(path)
+        size = len(self._buf)
+        if size < len(ARCHIVE_MAGIC) + _FOOTER.size or self._buf[: len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an SRS archive")
+        pos, length, magic = _FOOTER.unpack(self._buf[size - _FOOTER.size :])
+        if magic != ARCHIVE_MAGIC or pos + length > size - _FOOTER.size:
+            self.close()
+            raise ValueError(f"{path}: damaged archive footer")
+        self.index = json.loads(bytes(self._buf[pos : pos + length]).decode("utf-8"))
+        if self.index["version"] != ARCHIVE_VERSION or self.index["codec"] != "zlib":
+            self.close()
+            raise ValueError(f"{path}: unsupported archive version/codec")
+        self.chunk_frames = int(self.index["chunk_frames"])
+        self._offsets = self._array(self.index["chunks"])
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._cached: Tuple[int, Optional[np.ndarray]] = (-1, None)
+
+    def __repr__(self):
+        return f"SrsArchive({self.path!r}, {self.n_frames} frames x {self.npts} points)"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._buf = None
+
+    def _array(self, entry: Dict) -> np.ndarray:
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        arr = np.frombuffer(self._buf, dtype=dtype, count=count, offset=entry["offset"]).reshape(entry["shape"])
+        # a copy, so no view pins the mmap after close()
+        return arr.astype(dtype.newbyteorder("="))
+
+    def array(self, name: str) -> Optional[np.ndarray]:
+        """Uncompressed array stored next to the spectra, or None."""
+        entry = self.index["arrays"].get(name)
+        if entry is None:
+            return None
+        if name not in self._arrays:
+            self._arrays[name] = self._array(entry)
+        return self._arrays[name]
+
+    @property
+    def time(self) -> Optional[np.ndarray]:
+        return self.array("time")
+
+    @property
+    def wavenumber(self) -> Optional[np.ndarray]:
+        return self.array("wavenumber")
+
+    @property
+    def bg(self) -> Optional[np.ndarray]:
+        return self.array("bg")
+
+    @property
+    def meta(self) -> Dict:
+        return self.index["meta"]
+
+    @property
+    def shape(self):
+        return tuple(self.index["shape"])
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    @property
+    def n_frames(self) -> int:
+        return self.index["shape"][0]
+
+    @property
+    def npts(self) -> int:
+        return self.index["shape"][1]
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._offsets) - 1
+
+    def __len__(self):
+        return self.n_frames
+
+    def chunk(self, i: int) -> np.ndarray:
+        """Decoded frames of chunk ``i`` (read-only; shared with later calls)."""
+        if self._cached[0] == i:
+            return self._cached[1]
+        lo, hi = int(self._offsets[i]), int(self._offsets[i + 1])
+        frames = min(self.chunk_frames, self.n_frames - i * self.chunk_frames)
+        block = decode_chunk(self._buf[lo:hi], frames, self.npts, self.index["filters"])
+        block.flags.writeable = False
+        self._cached = (i, block)
+        return block
+
+    def iter_batches(self, start: int = 0, stop: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Frames ``start..stop-1`` as consecutive per-chunk blocks."""
+        start, stop, _ = slice(start, stop).indices(self.n_frames)
+        cf = self.chunk_frames
+        for c in range(start // cf, (stop - 1) // cf + 1 if stop > start else start // cf):
+            yield self.chunk(c)[max(start - c * cf, 0) : stop - c * cf]
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Frames ``start..stop-1`` as one ``(frames, npts)`` float32 array."""
+        parts = list(self.iter_batches(start, stop))
+        return np.concatenate(parts) if parts else np.empty((0, self.npts), dtype=np.float32)
+
+    def __getitem__(self, key):
+        rows, cols = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if len(cols) > 1:
+            raise IndexError(f"too many indices for archive: 2-dimensional, but {len(key)} were indexed")
+        n, cf = self.n_frames, self.chunk_frames
+        if isinstance(rows, (int, np.integer)):
+            if not -n <= rows < n:
+                raise IndexError(f"frame index out of range (n_frames={n})")
+            rows = int(rows) % n
+            out = np.array(self.chunk(rows // cf)[rows % cf])
+            return out[cols] if cols else out
+        if isinstance(rows, slice) and rows.indices(n)[2] == 1:
+            out = self.read(*rows.indices(n)[:2])
+        else:
+            idx = np.arange(n)[rows]
+            out = np.empty((len(idx), self.npts), dtype=np.float32)
+            # one pass over the chunks involved, in chunk order
+            order = np.argsort(idx // cf, kind="stable")
+            owner = idx[order] // cf
+            bounds = np.flatnonzero(np.diff(owner)) + 1
+            for sel in np.split(order, bounds):
+                if len(sel):
+                    c = int(idx[sel[0]] // cf)
+                    out[sel] = self.chunk(c)[idx[sel] - c * cf]
+        return out[(slice(None),) + cols] if cols else out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self.read()
+        return out if dtype is None else out.astype(dtype)
+
+
+def _text_blocks(path: str) -> Iterator[np.ndarray]:
+    with open(path, encoding="utf-8") as fh:
+        fh.readline()
+        while True:
+            lines = list(itertools.islice(fh, PACK_TEXT_ROWS))
+            if not lines:
+                return
+            yield np.loadtxt(lines, dtype=np.float64, delimiter="\t", ndmin=2)
+
+
+def _sibling(path: str, suffix: str) -> Optional[str]:
+    return path + suffix if os.path.exists(path + suffix) else None
+
+
+def load_extraction_output(path: str):
+    """Spectra batches and the side arrays of an earlier extraction output.
+
+    Accepts the time-series ``.txt`` (with ``{base}_bg.txt`` next to it), a ``.npz``
+    or ``{base}_spectra.npy`` (with the other ``{base}_*.npy`` next to it). Returns
+    ``(batches, arrays)``; for text input ``arrays["time"]`` is filled in while the
+    batches are consumed.
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as z:
+            data = {k: z[k] for k in z.files}
+        return [data.pop("spectra")], {k: data.get(k) for k in ("time", "wavenumber", "bg")}
+    if path.endswith("_spectra.npy"):
+        base = path[: -len("_spectra.npy")]
+        side = {k: _sibling(base, f"_{k}.npy") for k in ("time", "wavenumber", "bg")}
+        arrays = {k: np.load(p) if p else None for k, p in side.items()}
+        return [np.load(path, mmap_mode="r")], arrays
+    if not path.endswith(".txt"):
+        raise ValueError(f"{path}: expected an extraction output (.txt, .npz or _spectra.npy)")
+    with open(path, encoding="utf-8") as fh:
+        head = fh.readline().rstrip("\r\n")
+    has_time = head.startswith("\t")
+    wn = np.array(head.strip("\t").split("\t"), dtype=np.float64)
+    stem = path[: -len(".txt")]
+    for conv in ("_absorbance", "_transmittance"):
+        if stem.endswith(conv) and not os.path.exists(stem + "_bg.txt"):
+            stem = stem[: -len(conv)]
+    arrays = {"time": None, "wavenumber": wn, "bg": None}
+    bg_path = _sibling(stem, "_bg.txt")
+    if bg_path:
+        bg = np.loadtxt(bg_path, dtype=np.float64, delimiter="\t", skiprows=1, ndmin=2)
+        arrays["bg"] = bg[:, 1:].T.astype(np.float32)
+
+    def batches():
+        times = []
+        for block in _text_blocks(path):
+            if has_time:
+                times.append(block[:, 0])
+                block = block[:, 1:]
+            yield block.astype(np.float32)
+        if has_time:
+            arrays["time"] = np.concatenate(times) if times else np.empty(0)
+
+    return batches(), arrays
+
+
+def main():
+    from .cli import non_negative_int, parse_frame_range
+
+    parser = argparse.ArgumentParser(description="Pack extraction outputs into compressed SRS archives and read them back")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="Compress extraction outputs (.txt / .npz / _spectra.npy) into .srsa archives")
+    p.add_argument("inputs", nargs="+", help="Time-series outputs of run_extraction")
+    p.add_argument("-o", "--outdir", help="Directory for the archives (default: next to each input)")
+    p.add_argument("--chunk-frames", type=int, help="Frames per compressed chunk (default: about 1 MB per chunk)")
+    p.add_argument("--level", type=int, default=ARCHIVE_LEVEL, help=f"zlib level 0-9 (default {ARCHIVE_LEVEL})")
+    p.add_argument("--threads", type=int, default=0, help="Threads compressing chunks (default 0 = inline)")
+    p = sub.add_parser("info", help="Print shape, chunking, stored arrays and compression ratio")
+    p.add_argument("archives", nargs="+")
+    p = sub.add_parser("unpack", help="Write (a frame range of) an archive back as txt or npy")
+    p.add_argument("archive")
+    p.add_argument("--frames", help="Only frames START:STOP (Python slice bounds)")
+    p.add_argument("--format", choices=["txt", "npy"], default="txt", help="Output format (default txt)")
+    p.add_argument("--precision", type=non_negative_int, default=18, help="Digits for txt output (default 18)")
+    p.add_argument("-o", "--outdir", default=".", help="Output directory (default: current directory)")
+    args = parser.parse_args()
+
+    if args.cmd == "pack":
+        for path in args.inputs:
+            batches, arrays = load_extraction_output(path)
+            name = os.path.basename(path)
+            for suffix in ("_spectra.npy", ".npz", ".txt"):
+                if name.endswith(suffix):
+                    name = name[: -len(suffix)]
+                    break
+            out = os.path.join(args.outdir or os.path.dirname(path), f"{name}.srsa")
+            if args.outdir:
+                os.makedirs(args.outdir, exist_ok=True)
+            index = write_archive(out, batches, arrays, chunk_frames=args.chunk_frames, level=args.level,
+                                  workers=args.threads, meta={"source": os.path.basename(path)})
+            saved = os.path.getsize(path) / os.path.getsize(out)
+            print(f"📄 已保存: {out}（{index['shape'][0]} 帧 × {index['shape'][1]} 点，为原文件的 1/{saved:.1f}）")
+    elif args.cmd == "info":
+        for path in args.archives:
+            with SrsArchive(path) as a:
+                idx = a.index
+                ratio = idx["raw_bytes"] / idx["compressed_bytes"] if idx["compressed_bytes"] else 0
+                print(f"{path}: {a.n_frames} 帧 × {a.npts} 点，{a.n_chunks} 块（每块 {a.chunk_frames} 帧），"
+                      f"{idx['codec']} level {idx['level']} + {'/'.join(idx['filters']) or '无预处理'}，压缩比 {ratio:.2f}")
+                for name, entry in idx["arrays"].items():
+                    print(f"  {name}: {tuple(entry['shape'])} {np.dtype(entry['dtype']).name}")
+                if a.meta:
+                    print(f"  meta: {json.dumps(a.meta, ensure_ascii=False)}")
+    else:
+        with SrsArchive(args.archive) as a:
+            start, stop, _ = (parse_frame_range(args.frames) if args.frames else slice(None)).indices(a.n_frames)
+            stop = max(start, stop)
+            time_col = a.time[start:stop] if a.time is not None else None
+            name = os.path.splitext(os.path.basename(args.archive))[0]
+            os.makedirs(args.outdir, exist_ok=True)
+            if args.format == "txt":
+                out = os.path.join(args.outdir, f"{name}.txt")
+                wn = a.wavenumber if a.wavenumber is not None else np.arange(a.npts, dtype=float)
+                header = ("\t" if time_col is not None else "") + "\t".join(f"{x:.6f}" for x in wn)
+                write_text_batches(out, a.iter_batches(start, stop), header, first_col=time_col,
+                                   precision=args.precision)
+                print(f"📄 已保存: {out}")
+            else:
+                spectra = RowStream((stop - start, a.npts), a.iter_batches(start, stop))
+                for out in write_npy_arrays(args.outdir, name, {"spectra": spectra, "time": time_col,
+                                                                "wavenumber": a.wavenumber, "bg": a.bg}):
+                    print(f"📄 已保存: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from .cli import add_extraction_arguments, extraction_kwargs
+from .extract_core import run_extraction
+
+
+class FileResult(NamedTuple):
+    path: str
+    size: int
+    seconds: float
+    written: List[str]
+    error: Optional[str]
+    log: str
+
+
+def collect_srs_files(inputs: Sequence[str], recursive: bool = False) -> List[str]:
+    """Expand files, directories (their ``*.srs``) and glob patterns into a sorted, de-duplicated list."""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif os.path.isfile(item):
+            found.append(item)
+            continue
+        else:
+            candidates = glob.glob(item, recursive=True)
+        found.extend(p for p in candidates if os.path.isfile(p) and p.lower().endswith(".srs"))
+    return sorted(dict.fromkeys(os.path.abspath(p) for p in found))
+
+
+def _extract_one(path: str, options: Dict) -> FileResult:
+    # runs in a worker process; the pipeline's console output is kept per file
+    t0 = time.perf_counter()
+    log = io.StringIO()
+    written, error = [], None
+    try:
+        with contextlib.redirect_stdout(log):
+            written = run_extraction(path, **options)
+        if written is None:
+            error = "未生成输出（详见日志）"
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    return FileResult(path, os.path.getsize(path), time.perf_counter() - t0, written or [], error, log.getvalue())
+
+
+def run_batch(files: Sequence[str], workers: Optional[int] = None, verbose: bool = False, **options) -> List[FileResult]:
+    """Run ``run_extraction`` on every file over a process pool and print a throughput summary.
+
+    ``options`` are passed to ``run_extraction`` (``mode``, ``outdir``, ``start_wn``, ...).
+    A failing file is reported and does not stop the others; if a worker dies
+    (e.g. a crash inside NumPy) the unfinished files are retried once in a new pool.
+    """
+    files = list(files)
+    workers = workers or os.cpu_count() or 1
+    results: Dict[str, FileResult] = {}
+    t0 = time.perf_counter()
+
+    def report(res: FileResult):
+        results[res.path] = res
+        name = os.path.basename(res.path)
+        if res.error is None:
+            print(f"[{len(results)}/{len(files)}] ✅ {name}  {res.size / 1e6:.1f} MB, {res.seconds:.2f} s")
+        else:
+            print(f"[{len(results)}/{len(files)}] ❌ {name}: {res.error}")
+        if verbose or res.error is not None:
+            for line in res.log.strip().splitlines():
+                print(f"    {line}")
+
+    # same {base}.txt layout as the single-file CLI, so equal base names would overwrite each other
+    owners: Dict[str, str] = {}
+    todo = []
+    for path in files:
+        base = os.path.splitext(os.path.basename(path))[0].lower()
+        if base in owners:
+            report(FileResult(path, os.path.getsize(path), 0.0, [], f"输出文件名与 {owners[base]} 重复，已跳过", ""))
+        else:
+            owners[base] = path
+            todo.append(path)
+
+    if workers <= 1:
+        for path in todo:
+            report(_extract_one(path, options))
+    else:
+        for attempt in range(2):
+            broken = []
+            with ProcessPoolExecutor(max_workers=min(workers, max(len(todo), 1))) as pool:
+                futures = {pool.submit(_extract_one, path, options): path for path in todo}
+                for fut in as_completed(futures):
+                    path = futures[fut]
+                    try:
+                        report(fut.result())
+                    except BrokenProcessPool:
+                        broken.append(path)
+                    except Exception as exc:
+                        report(FileResult(path, os.path.getsize(path), 0.0, [], f"{type(exc).__name__}: {exc}", ""))
+            if not broken:
+                break
+            todo = sorted(broken)
+            if attempt == 0:
+                print(f"⚠ 工作进程异常退出，重试 {len(todo)} 个文件")
+        else:
+            for path in todo:
+                report(FileResult(path, os.path.getsize(path), 0.0, [], "工作进程异常退出", ""))
+
+    elapsed = time.perf_counter() - t0
+    ordered = [results[p] for p in files]
+    ok = [r for r in ordered if r.error is None]
+    failed = [r for r in ordered if r.error is not None]
+    total_mb = sum(r.size for r in ok) / 1e6
+    print("=" * 60)
+    print(f"完成 {len(ok)}/{len(files)} 个文件，失败 {len(failed)}，进程数 {workers}，用时 {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"吞吐: {len(ok) / elapsed:.2f} 文件/s，{total_mb / elapsed:.1f} MB/s（共 {total_mb:.1f} MB）")
+    for r in failed:
+        print(f"  ❌ {r.path}: {r.error}")
+    return ordered
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract many Omnic SRS files (files, directories or glob patterns) in parallel"
+    )
+    parser.add_argument("inputs", nargs="+", help=".srs files, directories containing them, or glob patterns")
+    parser.add_argument("--mode", choices=["fast", "realtime", "auto"], default="auto",
+                        help="SRS format: 'fast', 'realtime' or 'auto' (default: detected per file)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--recursive", action="store_true", help="Also search subdirectories of directory inputs")
+    parser.add_argument("--verbose", action="store_true", help="Print each file's extraction log")
+    add_extraction_arguments(parser)
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a per-stage JSON performance report for every file (OUTDIR/{base}_profile.json)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="Also dump cProfile statistics for every file (OUTDIR/{base}.prof)")
+    args = parser.parse_args()
+
+    files = collect_srs_files(args.inputs, recursive=args.recursive)
+    if not files:
+        parser.error("no .srs files matched the given inputs")
+    print(f"共 {len(files)} 个 .srs 文件")
+    results = run_batch(files, workers=args.workers, verbose=args.verbose, **extraction_kwargs(args))
+    if any(r.error is not None for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
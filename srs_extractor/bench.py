@@ -0,0 +1,158 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from .common import parse_size
+from .extract_core import run_extraction
+from .synthetic import SyntheticInfo, frames_for_size, write_synthetic_srs
+
+DEFAULT_SIZES = ["10M", "100M", "1G"]
+# stage columns of the summary table; every stage is kept in the JSON results
+TABLE_STAGES = ["marker_scan", "time_axis", "spectra_matrix", "timeseries_write", "background_detect"]
+# a stage is reported as a regression when it is this much slower than the baseline ...
+REGRESSION_TOLERANCE = 0.2
+# ... and slower by at least this many seconds (ignores timer noise on tiny stages)
+REGRESSION_MIN_SECONDS = 0.05
+
+
+def _profile_once(path: str, options: Dict) -> Dict:
+    # runs in a fresh process so peak RSS belongs to this case only
+    report_path = os.path.join(options["outdir"], "profile.json")
+    with contextlib.redirect_stdout(io.StringIO()):
+        written = run_extraction(path, profile=report_path, use_cache=False, **options)
+    if written is None:
+        raise RuntimeError(f"extraction of {path} produced no output")
+    with open(report_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_case(path: str, options: Dict, repeat: int = 1) -> Dict:
+    """Best (lowest total time) of ``repeat`` profiled extractions, each in its own process."""
+    best = None
+    ctx = multiprocessing.get_context("spawn")
+    for _ in range(repeat):
+        os.makedirs(options["outdir"], exist_ok=True)
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                report = pool.submit(_profile_once, path, options).result()
+        finally:
+            shutil.rmtree(options["outdir"], ignore_errors=True)
+        if best is None or report["total_seconds"] < best["total_seconds"]:
+            best = report
+    return best
+
+
+def _summary(label: str, info, options: Dict, report: Dict) -> Dict:
+    return {
+        "case": f"{info.mode}-{label}-{options['out_format']}" + ("-pipeline" if options["pipeline"] else ""),
+        "mode": info.mode,
+        "size": label,
+        "file_bytes": info.size,
+        "n_frames": info.n_frames,
+        "npts": info.npts,
+        "format": options["out_format"],
+        "max_memory": options["max_memory"],
+        "pipeline": options["pipeline"],
+        "total_seconds": report["total_seconds"],
+        "mb_per_s": info.size / report["total_seconds"] / 1e6 if report["total_seconds"] > 0 else None,
+        "max_rss_bytes": report["max_rss_bytes"],
+        "stages": {s["name"]: {k: s[k] for k in ("seconds", "bytes", "frames", "mb_per_s", "frames_per_s")}
+                   for s in report["stages"]},
+    }
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """Stages (and totals) of ``results`` that got slower than in ``baseline``."""
+    old = {r["case"]: r for r in baseline}
+    found = []
+    for r in results:
+        b = old.get(r["case"])
+        if b is None:
+            continue
+        pairs = [("total", r["total_seconds"], b["total_seconds"])]
+        pairs += [(n, s["seconds"], b["stages"][n]["seconds"]) for n, s in r["stages"].items() if n in b["stages"]]
+        for name, new, ref in pairs:
+            if new > ref * (1 + tolerance) and new - ref >= REGRESSION_MIN_SECONDS:
+                found.append(f"{r['case']} {name}: {ref:.3f} s → {new:.3f} s（+{(new / ref - 1) if ref else 0:.0%}）")
+    return found
+
+
+def print_table(results: List[Dict]):
+    head = f"{'case':<30}{'frames':>9}" + "".join(f"{n:>18}" for n in TABLE_STAGES) + f"{'total':>10}{'MB/s':>9}{'RSS MB':>9}"
+    print(head)
+    print("-" * len(head))
+    for r in results:
+        cells = "".join(f"{r['stages'][n]['seconds']:>17.3f}s" if n in r["stages"] else f"{'-':>18}"
+                        for n in TABLE_STAGES)
+        rss = f"{r['max_rss_bytes'] / 1e6:>9.0f}" if r["max_rss_bytes"] else f"{'-':>9}"
+        print(f"{r['case']:<30}{r['n_frames']:>9}{cells}{r['total_seconds']:>9.3f}s{r['mb_per_s'] or 0:>9.1f}{rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time every run_extraction stage on synthetic SRS files of increasing size"
+    )
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help=f"File sizes such as 10M 500M 4G (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--modes", nargs="+", choices=["fast", "realtime"], default=["fast", "realtime"],
+                        help="SRS formats to benchmark (default: both)")
+    parser.add_argument("--npts", type=int, default=1024, help="Points per spectrum (default 1024)")
+    parser.add_argument("--format", choices=["txt", "npy", "npz", "archive"], default="npy",
+                        help="Output format (default npy; txt formatting dominates and needs ~10x the disk)")
+    parser.add_argument("--max-memory", type=parse_size, help="Run with this --max-memory budget (streaming mode)")
+    parser.add_argument("--pipeline", action="store_true", help="Run with the threaded read/decode/write pipeline")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept (default 1)")
+    parser.add_argument("--workdir",
+                        help="Keep generated files here and reuse them in later runs (default: temporary directory)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file (default bench_results.json)")
+    parser.add_argument("--baseline", help="Earlier results file: report stages slower by more than --tolerance and exit 1")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="Relative slowdown counted as a regression (default 0.2)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="srs_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    try:
+        for mode in args.modes:
+            for label in args.sizes:
+                n_frames = frames_for_size(parse_size(label), mode, args.npts)
+                path = os.path.join(workdir, f"synthetic_{mode}_{label}_{args.npts}.srs")
+                if os.path.exists(path):
+                    info = SyntheticInfo(path, mode, n_frames, args.npts, os.path.getsize(path), 4000.0, 650.0)
+                else:
+                    print(f"生成 {path} ...")
+                    info = write_synthetic_srs(path, mode=mode, n_frames=n_frames, npts=args.npts)
+                options = dict(mode=mode, outdir=os.path.join(workdir, "out"), out_format=args.format,
+                               max_memory=args.max_memory, pipeline=args.pipeline)
+                print(f"运行 {mode}-{label}（{info.size / 1e6:.0f} MB，{n_frames} 帧）...")
+                results.append(_summary(label, info, options, run_case(path, options, args.repeat)))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, ensure_ascii=False, indent=2)
+    print(f"📄 已保存基准结果: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        if regressions:
+            print(f"⚠ 相对基线变慢 {len(regressions)} 项:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("✅ 未发现相对基线的性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import numpy as np
-from collections import defaultdict
-from typing import List
-from .common import find_all
+from typing import Dict, List, Optional
+from .scanner import scan_markers
 
 # Copied from fast_scan_extract defaults
 BG_INTERVAL_BYTES = 9040
@@ -14,45 +13,76 @@ BG_MARKERS = [
 ]
 
 
-def detect_payloads_by_markers(srs: bytes, markers: List[dict] = BG_MARKERS, tol: int = 64, min_sep: int = 8000):
-    votes = defaultdict(int)
+def marker_needles(markers: List[dict] = BG_MARKERS):
+    return [bytes.fromhex(m["hex"]) for m in markers]
+
+
+def _merge_votes(pos: np.ndarray, votes: np.ndarray, tol: int):
+    """Merge sorted vote positions within ``tol`` into weighted centroids.
+
+    A gap larger than ``tol`` always starts a new cluster (the running centroid
+    never exceeds the previous position), so positions are split into runs with
+    np.diff and the runs are walked in lockstep, one element rank per step,
+    reproducing the sequential merge exactly (including its int truncation).
+    """
+    breaks = np.flatnonzero(np.diff(pos) > tol) + 1
+    run_start = np.concatenate(([0], breaks))
+    run_len = np.diff(np.concatenate((run_start, [len(pos)])))
+    cur_pos = pos[run_start].copy()
+    cur_votes = votes[run_start].copy()
+    out_pos, out_votes = [], []
+    for k in range(1, int(run_len.max())):
+        runs = np.flatnonzero(run_len > k)
+        p = pos[run_start[runs] + k]
+        v = votes[run_start[runs] + k]
+        cp, cv = cur_pos[runs], cur_votes[runs]
+        merge = np.abs(p - cp) <= tol
+        split = runs[~merge]
+        out_pos.append(cur_pos[split])
+        out_votes.append(cur_votes[split])
+        cur_pos[split], cur_votes[split] = p[~merge], v[~merge]
+        joined = runs[merge]
+        cur_pos[joined] = ((cp[merge] * cv[merge] + p[merge] * v[merge]) / (cv[merge] + v[merge])).astype(np.int64)
+        cur_votes[joined] = cv[merge] + v[merge]
+    out_pos.append(cur_pos)
+    out_votes.append(cur_votes)
+    return np.concatenate(out_pos), np.concatenate(out_votes)
+
+
+def detect_payloads_by_markers(
+    srs: bytes,
+    markers: List[dict] = BG_MARKERS,
+    tol: int = 64,
+    min_sep: int = 8000,
+    hits: Optional[Dict[bytes, np.ndarray]] = None,
+    max_hits: int = 50000,
+):
+    # hits may come from a shared scan_markers pass; otherwise scan here
+    if hits is None:
+        hits = scan_markers(srs, marker_needles(markers), max_hits=max_hits)
+    cands = []
     for m in markers:
         seq = bytes.fromhex(m["hex"])
         delta = int(m["delta_to_payload"])
-        hits = find_all(srs, seq, max_hits=50000)
-        for hp in hits:
-            pos = hp + delta
-            if 0 <= pos < len(srs):
-                votes[pos] += 1
-    if not votes:
+        pos = np.asarray(hits[seq][:max_hits], dtype=np.int64) + delta
+        cands.append(pos[(pos >= 0) & (pos < len(srs))])
+    if not cands or not sum(map(len, cands)):
         return []
-    items = sorted(votes.items())
-    merged = []
-    cur_pos, cur_votes = None, 0
-    for pos, v in items:
-        if cur_pos is None:
-            cur_pos, cur_votes = pos, v
-        elif abs(pos - cur_pos) <= tol:
-            cur_pos = int((cur_pos * cur_votes + pos * v) / (cur_votes + v))
-            cur_votes += v
-        else:
-            merged.append((cur_pos, cur_votes))
-            cur_pos, cur_votes = pos, v
-    if cur_pos is not None:
-        merged.append((cur_pos, cur_votes))
-    merged.sort(key=lambda x: (-x[1], x[0]))
+    pos, votes = np.unique(np.concatenate(cands), return_counts=True)
+    mpos, mvotes = _merge_votes(pos, votes.astype(np.int64), tol)
+    # greedy non-maximum suppression over (-votes, pos) order, at most 4 picks
+    ranked = mpos[np.lexsort((mpos, -mvotes))]
     picks = []
-    for pos, _ in merged:
-        if all(abs(pos - p) >= min_sep for p in picks):
-            picks.append(pos)
-        if len(picks) >= 4:
-            break
+    while len(ranked) and len(picks) < 4:
+        picks.append(int(ranked[0]))
+        ranked = ranked[np.abs(ranked - ranked[0]) >= min_sep]
     return sorted(picks)
 
 
-def extract_background_matrix(srs: bytes, payload_offsets: List[int], target_npts: int):
+def extract_background_matrix(srs: bytes, payload_offsets: List[int], target_npts: int, verbose: bool = True):
     if not payload_offsets:
-        print("未能定位背景 payload")
+        if verbose:
+            print("未能定位背景 payload")
         return None
     mats = []
     filesize = len(srs)
@@ -62,8 +92,10 @@ def extract_background_matrix(srs: bytes, payload_offsets: List[int], target_npt
         if a.size == npts:
             mats.append(a)
     if not mats:
-        print("背景读取失败")
+        if verbose:
+            print("背景读取失败")
         return None
     M = np.vstack(mats)
-    print(f"背景矩阵形状: {M.shape}")
+    if verbose:
+        print(f"背景矩阵形状: {M.shape}")
     return M
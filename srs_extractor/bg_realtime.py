@@ -1,24 +1,74 @@
 import numpy as np
+from typing import Optional
 from .common import DEFAULT_POINTS, QUALITY_STD_MIN
 
 
+# candidate probes evaluated together; bounds the prefix-sum buffers per batch
+PROBE_BATCH = 4096
+
+
+def _probe_batch(srs: bytes, offs: np.ndarray, npts: int):
+    """Classify probe windows at byte offsets ``offs`` using prefix sums.
+
+    Returns (maybe, sure): ``sure`` windows pass the finite + std test beyond any
+    rounding doubt, ``maybe`` windows need the exact check, the rest fail.
+    """
+    thr2 = QUALITY_STD_MIN ** 2
+    maybe = np.zeros(len(offs), dtype=bool)
+    sure = np.zeros(len(offs), dtype=bool)
+    fits = (offs >= 0) & (offs + 4 * npts <= len(srs))
+    for r in np.unique(offs[fits] % 4):
+        sel = np.flatnonzero(fits & (offs % 4 == r))
+        f32 = np.frombuffer(srs, dtype=np.float32, count=(len(srs) - int(r)) // 4, offset=int(r))
+        w = (offs[sel] - r) // 4
+        lo, hi = int(w[0]), int(w[-1]) + npts
+        bad = ~np.isfinite(f32[lo:hi])
+        nbad = np.concatenate(([0], np.cumsum(bad)))
+        st, en = w - lo, w - lo + npts
+        finite = nbad[en] == nbad[st]
+        if not finite.any():
+            continue
+        x = np.where(bad, 0.0, f32[lo:hi].astype(np.float64))
+        s1 = np.concatenate(([0.0], np.cumsum(x)))
+        s2 = np.concatenate(([0.0], np.cumsum(x * x)))
+        a1 = np.concatenate(([0.0], np.cumsum(np.abs(x))))
+        mean = (s1[en] - s1[st]) / npts
+        var = (s2[en] - s2[st]) / npts - mean * mean
+        # sequential cumsum error bound, carried into the variance estimate
+        eps = np.finfo(np.float64).eps * (hi - lo)
+        dm = 2 * eps * a1[en] / npts
+        err = 2 * eps * s2[en] / npts + 2 * np.abs(mean) * dm + dm * dm
+        # float32 np.std may overflow on huge values: always confirm those exactly
+        huge = (a1[en] - a1[st]) >= 1e37
+        maybe[sel] = finite & (huge | (var + err > thr2 * 0.99))
+        sure[sel] = finite & ~huge & (var - err > thr2 * 1.01)
+    return maybe, sure
+
+
 def find_first_background_offset(
     srs: bytes,
     interval_bytes: int = 9040,
     offset_adjust: int = -404,
     scan_step: int = 512,
     nprobe_points: int = DEFAULT_POINTS,
+    end: Optional[int] = None,
 ):
+    # ``end`` probes only guesses below it (e.g. the first frame marker) instead of
+    # leaving out the last 10 intervals of the file
     filesize = len(srs)
-    lim = max(0, filesize - 10 * max(interval_bytes, 1))
-    first_guess = 0
-    while first_guess < lim:
-        off = first_guess + offset_adjust
-        if 0 <= off < filesize:
+    lim = min(end, filesize) if end is not None else max(0, filesize - 10 * max(interval_bytes, 1))
+    for b0 in range(0, lim, scan_step * PROBE_BATCH):
+        guesses = np.arange(b0, min(lim, b0 + scan_step * PROBE_BATCH), scan_step, dtype=np.int64)
+        offs = guesses + offset_adjust
+        with np.errstate(invalid="ignore", over="ignore"):
+            maybe, sure = _probe_batch(srs, offs, nprobe_points)
+        for i in np.flatnonzero(maybe):
+            off = int(offs[i])
+            if sure[i]:
+                return off
             a = np.frombuffer(srs, dtype=np.float32, count=nprobe_points, offset=off)
-            if a.size == nprobe_points and np.isfinite(a).all() and np.std(a) > QUALITY_STD_MIN:
+            if np.isfinite(a).all() and np.std(a) > QUALITY_STD_MIN:
                 return off
-        first_guess += scan_step
     return None
 
 
@@ -28,17 +78,23 @@ def extract_background_first(
     interval_bytes: int = 9040,
     offset_adjust: int = -404,
     scan_step: int = 512,
+    offset: Optional[int] = None,
+    verbose: bool = True,
 ):
-    off = find_first_background_offset(srs, interval_bytes, offset_adjust, scan_step)
+    # a known offset (e.g. from the frame-index cache) skips the interval scan
+    off = offset if offset is not None else find_first_background_offset(srs, interval_bytes, offset_adjust, scan_step)
     if off is None:
-        print("未找到背景片段（按间隔扫描失败）")
+        if verbose:
+            print("未找到背景片段（按间隔扫描失败）")
         return None, None
     filesize = len(srs)
     npts = min((filesize - off) // 4, target_npts)
     vec = np.frombuffer(srs, dtype=np.float32, count=npts, offset=off)
     if vec.size != npts:
-        print("背景读取失败（长度不匹配）")
+        if verbose:
+            print("背景读取失败（长度不匹配）")
         return None, off
-    print(f"背景起点: {off} ；长度 {npts}")
+    if verbose:
+        print(f"背景起点: {off} ；长度 {npts}")
     return vec[np.newaxis, :], off
 
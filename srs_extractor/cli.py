@@ -1,5 +1,111 @@
 import argparse
+from .common import parse_size
 from .extract_core import run_extraction
+from .file_identify import guess_srs_type
+from .follow import follow_extraction
+
+def parse_frame_range(text: str) -> slice:
+    # "1000:2000", "1000:", ":500", "-100:"
+    parts = text.split(":")
+    if len(parts) != 2:
+        raise argparse.ArgumentTypeError("expected START:STOP")
+    try:
+        return slice(*(int(p) if p.strip() else None for p in parts))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected integer START:STOP")
+
+
+def non_negative_int(text: str) -> int:
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError("must be >= 0")
+    return value
+
+
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be >= 1")
+    return value
+
+
+def positive_float(text: str) -> float:
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError("must be > 0")
+    return value
+
+
+def parse_bg_ref(text: str):
+    # "mean" -> None, "2" -> row index 1 (bg2)
+    if text.strip().lower() == "mean":
+        return None
+    return positive_int(text) - 1
+
+
+def add_extraction_arguments(parser: argparse.ArgumentParser):
+    """Options shared by the single-file and batch CLIs; read back with ``extraction_kwargs``.
+
+    The caller adds ``--mode``, ``--profile`` and ``--cprofile``, whose defaults differ.
+    """
+    parser.add_argument("--outdir", default="output", help="Output directory for results")
+    parser.add_argument("--start", type=float,
+                        help="Wavenumber start (cm⁻¹); default: read from the file header (prompted only if missing)")
+    parser.add_argument("--end", type=float,
+                        help="Wavenumber end (cm⁻¹); default: read from the file header (prompted only if missing)")
+    parser.add_argument("--precision", type=non_negative_int, default=18,
+                        help="Digits after the decimal point in text output (default 18, same as np.savetxt)")
+    parser.add_argument("--format", choices=["txt", "npy", "npz", "archive"], default="txt",
+                        help="Output format: 'txt' (tab-separated), 'npy' (one float32 .npy per array, "
+                             "memory-mappable), 'npz' (all arrays in one file) or 'archive' (compressed, "
+                             "chunk-indexed .srsa, see srs_extractor.archive)")
+    parser.add_argument("--max-memory", type=parse_size,
+                        help="Memory budget per file such as 512M or 2G: decode and write frames in batches that fit, "
+                             "for files larger than RAM (default: whole matrix at once)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always rescan the file instead of reusing the cached frame index "
+                             "(the cache is on by default and written to the --cache-dir directory)")
+    parser.add_argument("--cache-dir",
+                        help="Directory for frame-index caches (default: $XDG_CACHE_HOME/srs_extractor or ~/.cache/srs_extractor)")
+    parser.add_argument("--frames", type=parse_frame_range, metavar="START:STOP",
+                        help="Only frames START..STOP-1 (Python slice bounds, either may be omitted or negative)")
+    parser.add_argument("--stride", type=positive_int, default=1, help="Keep every N-th selected frame (default 1)")
+    parser.add_argument("--time-range", type=float, nargs=2, metavar=("T0", "T1"),
+                        help="Only frames whose time/potential lies in [T0, T1]")
+    parser.add_argument("--crop", type=float, nargs=2, metavar=("LOW", "HIGH"),
+                        help="Only export wavenumbers in [LOW, HIGH] cm⁻¹; only those columns are decoded")
+    binning = parser.add_mutually_exclusive_group()
+    binning.add_argument("--coadd", type=positive_int, metavar="N",
+                         help="Average every N consecutive frames into one output row")
+    binning.add_argument("--time-bin", type=positive_float, metavar="DT",
+                         help="Average consecutive frames falling in the same DT-wide time/potential bin")
+    parser.add_argument("--convert", choices=["absorbance", "transmittance"],
+                        help="Write -log10(S/BG) or S/BG instead of the raw single-beam spectra, computed per batch")
+    parser.add_argument("--bg-ref", type=parse_bg_ref, metavar="{mean,N}",
+                        help="Background used by --convert: 'mean' of all bg rows (default) or row N (1-based, as bgN)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap reading, decoding and writing on separate threads linked by bounded queues")
+    parser.add_argument("--validate", action="store_true",
+                        help="Check frame lengths, the time axis and every frame for NaN/Inf or flat spectra; "
+                             "writes OUTDIR/{base}_validation.json")
+    parser.add_argument("--drop-bad", action="store_true",
+                        help="Validate and leave out short, NaN/Inf and flat frames (decodes the frames twice)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Add per-stage tracemalloc peaks to the --profile report (slows allocation-heavy stages)")
+
+
+def extraction_kwargs(args: argparse.Namespace) -> dict:
+    """``run_extraction`` keyword arguments from parsed ``add_extraction_arguments`` options."""
+    return dict(
+        mode=args.mode, outdir=args.outdir, start_wn=args.start, end_wn=args.end, precision=args.precision,
+        out_format=args.format, max_memory=args.max_memory, use_cache=not args.no_cache, cache_dir=args.cache_dir,
+        frames=args.frames, stride=args.stride,
+        time_range=tuple(args.time_range) if args.time_range else None,
+        crop=tuple(args.crop) if args.crop else None,
+        coadd=args.coadd, time_bin=args.time_bin, convert=args.convert, bg_ref=args.bg_ref,
+        pipeline=args.pipeline, validate=args.validate, drop_bad=args.drop_bad,
+        profile=args.profile, cprofile=args.cprofile, trace_memory=args.trace_memory,
+    )
 
 
 def main():
@@ -7,15 +113,45 @@ def main():
         description="Extract spectra and background from Omnic SRS files (Rapid Scan / Realtime)"
     )
     parser.add_argument("srs", help="Path to .srs file")
-    parser.add_argument("--mode", choices=["fast", "realtime"], required=True,
-                        help="Specify SRS format: 'fast' (Omnic Rapid Scan) or 'realtime'")
-    parser.add_argument("--outdir", default="output", help="Output directory for results")
-    parser.add_argument("--start", type=float, help="Wavenumber start (cm⁻¹)")
-    parser.add_argument("--end", type=float, help="Wavenumber end (cm⁻¹)")
+    parser.add_argument("--mode", choices=["fast", "realtime", "auto"], required=True,
+                        help="Specify SRS format: 'fast' (Omnic Rapid Scan), 'realtime', "
+                             "or 'auto' to detect it from a small sample of the file start")
+    add_extraction_arguments(parser)
+    parser.add_argument("--write-threads", type=int, default=0,
+                        help="Threads formatting text chunks (or compressing archive chunks) while writing "
+                             "(default 0 = inline)")
+    parser.add_argument("--follow", action="store_true",
+                        help="Realtime only: keep tailing a file that is still being acquired and append "
+                             "newly completed frames to the text output")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Seconds between checks for new data with --follow (default 1.0)")
+    parser.add_argument("--idle-timeout", type=float,
+                        help="With --follow, stop after this many seconds without new frames (default: run until Ctrl+C)")
+    parser.add_argument("--profile", nargs="?", const=True, default=False, metavar="REPORT",
+                        help="Write a JSON report of time, bytes, frames and peak memory per stage "
+                             "(default path: OUTDIR/{base}_profile.json)")
+    parser.add_argument("--cprofile", nargs="?", const=True, default=False, metavar="STATS",
+                        help="Also dump cProfile statistics for pstats/snakeviz (default path: OUTDIR/{base}.prof)")
     args = parser.parse_args()
 
-    run_extraction(args.srs, mode=args.mode, outdir=args.outdir,
-                   start_wn=args.start, end_wn=args.end)
+    if args.follow:
+        if args.mode == "auto":
+            try:
+                args.mode = guess_srs_type(args.srs)
+            except (OSError, ValueError) as exc:
+                parser.error(str(exc))
+        if args.mode != "realtime" or args.format != "txt":
+            parser.error("--follow requires --mode realtime and --format txt")
+        if args.frames or args.stride > 1 or args.time_range or args.crop or args.coadd or args.time_bin or args.convert:
+            parser.error("--follow does not support --frames/--stride/--time-range/--crop/--coadd/--time-bin/--convert")
+        if args.profile or args.cprofile or args.trace_memory or args.pipeline or args.validate or args.drop_bad:
+            parser.error("--follow does not support --profile/--cprofile/--trace-memory/--pipeline/--validate/--drop-bad")
+        follow_extraction(args.srs, outdir=args.outdir, start_wn=args.start, end_wn=args.end,
+                          precision=args.precision, poll_interval=args.poll_interval,
+                          idle_timeout=args.idle_timeout)
+        return
+
+    run_extraction(args.srs, write_workers=args.write_threads, **extraction_kwargs(args))
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import mmap
 import numpy as np
 
 # Shared constants
@@ -5,12 +6,70 @@ FRAME_MARKER_HEX = "c6 d7 cd bc b2 c9 d3 da"
 DEFAULT_POINTS = 1024
 QUALITY_STD_MIN = 1e-6
 
+_SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    # "512M", "2G", "1.5g" or a plain byte count
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in _SIZE_UNITS:
+        return int(float(text[:-1]) * _SIZE_UNITS[text[-1]])
+    return int(text)
+
 
 def read_all_bytes(path: str) -> bytes:
     with open(path, "rb") as f:
         return f.read()
 
 
+def map_srs(path: str):
+    # Read-only mmap: supports len/slicing/find and the buffer protocol like bytes,
+    # but pages are only faulted in when decoded and are shared via the page cache.
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return f.read()
+
+
+def close_srs(buf):
+    # Unmap a map_srs buffer now instead of whenever it is collected (long-running
+    # workers would keep one map per job, and Windows locks mapped files). A view
+    # still alive, e.g. pinned by an exception traceback, leaves it to the collector.
+    if isinstance(buf, mmap.mmap):
+        try:
+            buf.close()
+        except BufferError:
+            pass
+
+
+def release_pages(buf, start: int, end: int):
+    # Drop already-decoded mmap pages from this process' RSS; the OS page cache
+    # keeps them, so a later access is only a minor fault. No-op for bytes.
+    if not isinstance(buf, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    start -= start % mmap.PAGESIZE
+    end = min(end, len(buf))
+    if end > start:
+        buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def prefetch_pages(buf, start: int, end: int):
+    # Bring [start, end) of an mmap into memory ahead of use: ask the kernel to read
+    # it ahead, then touch one byte per page inside a NumPy reduction (which runs
+    # without the GIL, so other threads keep working while this one waits on I/O).
+    if not isinstance(buf, mmap.mmap):
+        return
+    start -= start % mmap.PAGESIZE
+    end = min(end, len(buf))
+    if end <= start:
+        return
+    if hasattr(mmap, "MADV_WILLNEED"):
+        buf.madvise(mmap.MADV_WILLNEED, start, end - start)
+    np.bitwise_or.reduce(np.frombuffer(buf, dtype=np.uint8, count=end - start, offset=start)[:: mmap.PAGESIZE])
+
+
 def find_all(haystack: bytes, needle: bytes, max_hits: int = 200000):
     out, st = [], 0
     while True:
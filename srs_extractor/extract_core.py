@@ -1,87 +1,459 @@
 import os
 import numpy as np
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
 
-from .common import read_all_bytes, FRAME_MARKER_HEX
+from .common import close_srs, map_srs, FRAME_MARKER_HEX
 from .time_axis import extract_time_axis
-from .spectra_matrix import extract_spectra_matrix
-from .bg_fast import detect_payloads_by_markers, extract_background_matrix
-from .bg_realtime import extract_background_first
+from .spectra_matrix import (
+    bin_labels,
+    bin_means,
+    coadd_batches,
+    convert_batches,
+    crop_columns,
+    frame_payloads,
+    iter_spectra_batches,
+    reference_spectrum,
+    select_frames,
+)
+from .scanner import SCAN_CHUNK_BYTES, scan_markers
+from .writers import CHUNK_ROWS, RowStream, write_text_batches, write_text_matrix, write_npy_arrays, write_npz_arrays
+from .archive import write_archive
+from .bg_fast import BG_INTERVAL_BYTES, marker_needles, detect_payloads_by_markers, extract_background_matrix
+from .bg_realtime import find_first_background_offset, extract_background_first
+from .index_cache import FrameIndex, load_frame_index, save_frame_index
+from .file_identify import IDENTIFY_SAMPLE_BYTES, identify_srs_type
+from .header import HEADER_SEARCH_BYTES, resolve_wavenumber_range
+from .profiling import NullProfiler, StageProfiler, json_safe, print_report
+from .pipeline import pipeline_batch_frames, pipelined_batches
+from .validate import FrameQuality, content_report, length_report, print_validation, time_report, write_validation
 
+# approximate working memory per decoded value while writing; text formatting
+# temporaries dominate, binary output only holds the float32 batch
+TEXT_BYTES_PER_VALUE = 256
+BINARY_BYTES_PER_VALUE = 8
 
-def run_extraction(srs_path: str, mode: str = "fast", outdir: str = "output", start_wn: Optional[float] = None, end_wn: Optional[float] = None):
-    srs = read_all_bytes(srs_path)
+
+def frames_per_batch(max_memory: Optional[int], npts: int, out_format: str) -> Optional[int]:
+    if not max_memory:
+        return None
+    per_value = TEXT_BYTES_PER_VALUE if out_format == "txt" else BINARY_BYTES_PER_VALUE
+    return max(1, int(max_memory) // (npts * per_value))
+
+
+def locate_background(
+    srs: bytes, mode: str, hits: Optional[Dict[bytes, np.ndarray]] = None, verbose: bool = True
+) -> List[int]:
+    """Background payload offsets for ``mode``; ``hits`` may come from the shared marker scan."""
+    if mode == "fast":
+        bg_offsets = detect_payloads_by_markers(srs, hits=hits)
+        if not bg_offsets:
+            if verbose:
+                print("未找到背景标记，尝试按间隔扫描 (fallback)")
+            first_guess = find_first_background_offset(
+                srs, interval_bytes=BG_INTERVAL_BYTES, offset_adjust=0, scan_step=512, nprobe_points=1024
+            )
+            if first_guess is not None:
+                bg_offsets = [first_guess + i * BG_INTERVAL_BYTES for i in range(3)]
+        return bg_offsets
+    off = find_first_background_offset(srs, interval_bytes=9040, offset_adjust=-404, scan_step=512)
+    return [] if off is None else [off]
+
+
+def read_background(srs: bytes, mode: str, bg_offsets: List[int], npts: int, verbose: bool = True):
+    """(n_bg, npts) background matrix at the located offsets, or None."""
+    if mode == "fast":
+        if bg_offsets and verbose:
+            print("定位到背景 payload 起点:")
+            for i, p in enumerate(bg_offsets, 1):
+                print(f"  BG#{i} @SRS {p}")
+        return extract_background_matrix(srs, bg_offsets, npts, verbose=verbose)
+    if not bg_offsets:
+        if verbose:
+            print("未找到背景片段（按间隔扫描失败）")
+        return None
+    bg_matrix, _ = extract_background_first(
+        srs,
+        target_npts=npts,
+        interval_bytes=9040,
+        offset_adjust=-404,
+        scan_step=512,
+        offset=bg_offsets[0],
+        verbose=verbose,
+    )
+    return bg_matrix
+
+
+def run_extraction(
+    srs_path: str,
+    mode: str = "fast",
+    outdir: str = "output",
+    start_wn: Optional[float] = None,
+    end_wn: Optional[float] = None,
+    precision: int = 18,
+    write_workers: int = 0,
+    out_format: str = "txt",
+    max_memory: Optional[int] = None,
+    use_cache: bool = True,
+    cache_dir: Optional[str] = None,
+    frames: Optional[slice] = None,
+    stride: int = 1,
+    time_range: Optional[Tuple[float, float]] = None,
+    crop: Optional[Tuple[float, float]] = None,
+    coadd: Optional[int] = None,
+    time_bin: Optional[float] = None,
+    convert: Optional[str] = None,
+    bg_ref: Optional[int] = None,
+    pipeline: bool = False,
+    validate: bool = False,
+    drop_bad: bool = False,
+    profile: Union[bool, str] = False,
+    cprofile: Union[bool, str] = False,
+    trace_memory: bool = False,
+):
+    """Extract spectra, time axis and background of one ``.srs`` file into ``outdir``.
+
+    Returns the written paths, or None when the file could not be extracted.
+    ``pipeline`` overlaps reading, decoding and writing on separate threads.
+    ``validate`` checks frame lengths, the time axis and every decoded frame
+    (NaN/Inf, flat) and writes ``{outdir}/{base}_validation.json``; ``drop_bad``
+    also leaves out short, non-finite and flat frames (one extra decoding pass).
+    ``profile`` records every stage (wall time, bytes, frames, peak memory) into a
+    JSON report (True: ``{outdir}/{base}_profile.json``, or a path); ``cprofile``
+    also dumps cProfile statistics (True: ``{outdir}/{base}.prof``, or a path);
+    ``trace_memory`` adds per-stage tracemalloc peaks to the report.
+    """
+    if coadd is not None and coadd < 1:
+        raise ValueError(f"coadd must be >= 1, got {coadd}")
+    if time_bin is not None and not time_bin > 0:
+        raise ValueError(f"time_bin must be > 0, got {time_bin}")
+    if coadd is not None and time_bin is not None:
+        raise ValueError("coadd and time_bin are mutually exclusive")
+    options = dict(
+        mode=mode, outdir=outdir, start_wn=start_wn, end_wn=end_wn, precision=precision,
+        write_workers=write_workers, out_format=out_format, max_memory=max_memory, use_cache=use_cache,
+        cache_dir=cache_dir, frames=frames, stride=stride, time_range=time_range, crop=crop, coadd=coadd,
+        time_bin=time_bin, convert=convert, bg_ref=bg_ref, pipeline=pipeline,
+        validate=validate, drop_bad=drop_bad,
+    )
+    if not profile and not cprofile and not trace_memory:
+        return _extract(srs_path, NullProfiler(), **options)
+
+    prof = StageProfiler(cprofile=bool(cprofile), trace_memory=trace_memory)
+    prof.meta.update(file=os.path.abspath(srs_path), options=json_safe(options))
+    prof.start()
+    try:
+        written = _extract(srs_path, prof, **options)
+    finally:
+        prof.stop()
+    prof.meta["completed"] = written is not None
+    base_name = os.path.splitext(os.path.basename(srs_path))[0]
+    report_path = profile if isinstance(profile, str) else os.path.join(outdir, f"{base_name}_profile.json")
+    stats_path = cprofile if isinstance(cprofile, str) else os.path.join(outdir, f"{base_name}.prof")
+    print_report(prof.write(report_path, stats_path if cprofile else None))
+    print(f"📄 已保存性能报告: {report_path}")
+    if cprofile:
+        print(f"📄 已保存 cProfile 统计: {stats_path}")
+    return written
+
+
+def _extract(srs_path: str, prof, **options):
+    srs = map_srs(srs_path)
+    try:
+        return _extract_mapped(srs_path, srs, prof, **options)
+    finally:
+        close_srs(srs)
+
+
+def _extract_mapped(
+    srs_path: str,
+    srs,
+    prof,
+    mode: str,
+    outdir: str,
+    start_wn: Optional[float],
+    end_wn: Optional[float],
+    precision: int,
+    write_workers: int,
+    out_format: str,
+    max_memory: Optional[int],
+    use_cache: bool,
+    cache_dir: Optional[str],
+    frames: Optional[slice],
+    stride: int,
+    time_range: Optional[Tuple[float, float]],
+    crop: Optional[Tuple[float, float]],
+    coadd: Optional[int],
+    time_bin: Optional[float],
+    convert: Optional[str],
+    bg_ref: Optional[int],
+    pipeline: bool,
+    validate: bool,
+    drop_bad: bool,
+):
     os.makedirs(outdir, exist_ok=True)
     marker = bytes.fromhex(FRAME_MARKER_HEX)
     print(f"文件大小: {len(srs):,} bytes")
+    if mode == "auto":
+        with prof.stage("identify") as rec:
+            mode, reasons = identify_srs_type(srs[:IDENTIFY_SAMPLE_BYTES])
+            rec["bytes"] = min(len(srs), IDENTIFY_SAMPLE_BYTES)
+        if mode is None:
+            print(f"无法自动识别文件类型（{'；'.join(reasons)}），请用 --mode fast/realtime 指定。终止")
+            return
+        print(f"自动识别: {'；'.join(reasons)}")
     print(f"运行模式: {mode}")
+    prof.meta.update(size=len(srs), mode=mode)
 
-    # Step 1: 时间轴 + 帧位置
-    time_axis, frame_positions = extract_time_axis(srs, marker,mode)
+    # Step 1: 单次扫描帧标记（fast 模式同时扫描背景标记）+ 时间轴；命中缓存时跳过扫描
+    streaming = max_memory is not None
+    payload_offset = 80 if mode == "fast" else 84
+    index = None
+    if use_cache:
+        with prof.stage("index_cache_load"):
+            index = load_frame_index(srs_path, srs, mode, cache_dir)
+    if index is not None:
+        time_axis, frame_positions, bg_offsets = index.time_axis, index.positions, index.bg_offsets
+        hits = None
+        print(f"♻ 使用帧索引缓存，跳过扫描（{len(frame_positions)} 个帧标记）")
+    else:
+        needles = [marker] + (marker_needles() if mode == "fast" else [])
+        scan_chunk = max(1 << 20, min(SCAN_CHUNK_BYTES, int(max_memory) // 4)) if streaming else SCAN_CHUNK_BYTES
+        with prof.stage("marker_scan") as rec:
+            hits = scan_markers(srs, needles, chunk_bytes=scan_chunk, release=streaming, prefetch=pipeline)
+            rec["bytes"], rec["frames"] = len(srs), len(hits[marker])
+        with prof.stage("time_axis") as rec:
+            time_axis, frame_positions = extract_time_axis(srs, marker, mode, positions=hits[marker],
+                                                           release=streaming)
+            rec["frames"] = len(frame_positions)
+        bg_offsets = None
     if len(frame_positions) < 2:
         print("帧标记不足，终止")
         return
 
-    # Step 2: 光谱矩阵
-    payload_offset = 80 if mode == "fast" else 84
-    spectra = extract_spectra_matrix(srs, frame_positions, payload_offset)
-    if spectra is None:
+    # Step 2: 光谱矩阵（按帧布局分批解码，max_memory 限定每批帧数）
+    starts, points = frame_payloads(frame_positions, payload_offset)
+    if len(starts) == 0:
+        print("未解析到帧数据")
+        return
+    npts = int(points.min())
+    n_frames = len(starts)
+    frame_ids = np.arange(n_frames)
+    has_time = time_axis is not None and len(time_axis) >= n_frames
+    time_col = time_axis[:n_frames] if has_time else None
+    # 帧选择：只保留所选帧的 payload 偏移，之后只读取这些字节范围
+    if frames is not None or stride > 1 or time_range is not None:
+        if time_range is not None and time_col is None:
+            print("未解析出时间轴，无法按时间范围选择帧。终止")
+            return
+        rows = select_frames(n_frames, frames, stride, time_col, time_range)
+        print(f"帧选择: {len(rows)}/{n_frames} 帧")
+        if len(rows) == 0:
+            print("所选范围内没有帧。终止")
+            return
+        starts, points, frame_ids = starts[rows], points[rows], frame_ids[rows]
+        time_col = time_col[rows] if has_time else None
+        n_frames = len(rows)
+
+    # 帧校验：帧长度分布（所有帧按最短帧截齐）与时间轴；--drop-bad 先剔除短帧，其余帧不再被截短
+    report = None
+    if validate or drop_bad:
+        with prof.stage("validate") as rec:
+            report = {"lengths": length_report(points, npts, frame_ids), "time": time_report(time_col, frame_ids)}
+            rec["frames"] = n_frames
+        if drop_bad and report["lengths"]["short_frames"]:
+            keep = points >= report["lengths"]["short_min_npts"]
+            starts, points, frame_ids = starts[keep], points[keep], frame_ids[keep]
+            time_col = time_col[keep] if time_col is not None else None
+            print(f"帧校验: 剔除 {n_frames - len(starts)} 个短帧，每帧 {npts} → {int(points.min())} 点")
+            report["dropped_frames"] = n_frames - len(starts)
+            n_frames, npts = len(starts), int(points.min())
+
+    # Step 3: 波数轴（默认取自文件头，--start/--end 覆盖）；--crop 把波数范围换算成列区间，解码时每帧只读取这些列
+    with prof.stage("wavenumber_axis") as rec:
+        wn_range = resolve_wavenumber_range(srs, start_wn, end_wn, npts)
+        if start_wn is None or end_wn is None:
+            rec["bytes"] = min(len(srs), HEADER_SEARCH_BYTES)
+    if wn_range is None:
         return
+    start_wn, end_wn = wn_range
+    wn_axis = np.linspace(start_wn, end_wn, npts)
+    cols = slice(0, npts)
+    if crop is not None:
+        span = crop_columns(wn_axis, *crop)
+        if span is None:
+            print("裁剪范围内没有波数点。终止")
+            return
+        cols = slice(*span)
+        wn_axis = wn_axis[cols]
+        print(f"波数裁剪: {wn_axis[0]:.2f} ~ {wn_axis[-1]:.2f} cm⁻¹，保留 {len(wn_axis)}/{npts} 列")
+    ncols = cols.stop - cols.start
+
+    # 光谱内容校验（NaN/Inf、平坦帧）：--drop-bad 需在写出前多解码一遍；仅 --validate 时在写出的解码流中顺带检查
+    quality = None
+    if drop_bad:
+        quality = FrameQuality(n_frames)
+        step = frames_per_batch(max_memory, ncols, "npy") or pipeline_batch_frames(ncols)
+        with prof.stage("validate") as rec:
+            for _, block in iter_spectra_batches(srs, starts + 4 * cols.start, ncols, step, release=streaming):
+                quality.update(block)
+            rec["bytes"], rec["frames"] = 4 * n_frames * ncols, n_frames
+        report["content"] = content_report(quality, frame_ids)
+        keep = ~quality.bad
+        if not keep.all():
+            print(f"帧校验: 剔除 {n_frames - int(keep.sum())} 个含 NaN/Inf 或平坦的帧")
+            report["dropped_frames"] = report.get("dropped_frames", 0) + n_frames - int(keep.sum())
+            starts, frame_ids = starts[keep], frame_ids[keep]
+            time_col = time_col[keep] if time_col is not None else None
+            n_frames = len(starts)
+        if n_frames == 0:
+            print("所有帧均未通过校验。终止")
+            return
+    elif validate:
+        quality = FrameQuality(n_frames)
 
-    # Step 3: 波数轴
-    if start_wn is None or end_wn is None:
-        try:
-            start_wn = float(input("请输入波数起点(cm⁻¹): ").strip())
-            end_wn = float(input("请输入波数终点(cm⁻¹): ").strip())
-        except Exception:
-            print("波数输入无效。终止")
+    # 帧平均：每 N 帧或每个时间分箱内的连续帧在解码时按批归约为一行
+    labels = None
+    n_rows = n_frames
+    if (coadd and coadd > 1) or time_bin:
+        if time_bin and time_col is None:
+            print("未解析出时间轴，无法按时间分箱。终止")
+            return
+        labels = bin_labels(n_frames, coadd, time_col, time_bin)
+        n_rows = int(labels[-1]) + 1
+        time_col = bin_means(time_col, labels) if time_col is not None else None
+        print(f"帧平均: {n_frames} 帧 → {n_rows} 行")
+
+    print(f"光谱矩阵形状: {(n_rows, ncols)} （行=帧，列=波数点）")
+    prof.meta.update(n_frames=n_frames, npts=npts, shape=[n_rows, ncols])
+    batch_frames = frames_per_batch(max_memory, ncols, out_format)
+    if batch_frames:
+        print(f"流式模式: 每批 {batch_frames} 帧")
+    if pipeline:
+        # the pipeline needs several batches to overlap its stages
+        batch_frames = batch_frames or pipeline_batch_frames(ncols)
+        print(f"流水线模式: 读取/解码/写出并行，每批 {batch_frames} 帧")
+
+    def load_background():
+        nonlocal bg_offsets
+        with prof.stage("background_detect") as rec:
+            if bg_offsets is None:
+                bg_offsets = locate_background(srs, mode, hits)
+            bg = read_background(srs, mode, bg_offsets, npts)
+            rec["frames"] = 0 if bg is None else len(bg)
+        return bg[:, cols] if bg is not None and crop is not None else bg
+
+    # 吸光度/透过率：先定位背景，解码每批后立即换算，不同时保留原始与换算矩阵
+    bg_matrix = reference = None
+    if convert:
+        label = "吸光度" if convert == "absorbance" else "透过率"
+        bg_matrix = load_background()
+        if bg_matrix is None:
+            print(f"未找到背景，无法计算{label}。终止")
+            return
+        if bg_ref is not None and not 0 <= bg_ref < len(bg_matrix):
+            print(f"背景行 bg{bg_ref + 1} 不存在（共 {len(bg_matrix)} 行）。终止")
+            return
+        reference = reference_spectrum(bg_matrix, bg_ref)
+        if len(reference) != ncols:
+            print("背景长度与光谱列数不一致。终止")
             return
-    wn_axis = np.linspace(start_wn, end_wn, spectra.shape[1])
+        print(f"输出{label}，参比: {'bg' + str(bg_ref + 1) if bg_ref is not None else '背景平均'}")
 
-    # Step 4: 保存时间序列光谱
+    def postprocess(batches):
+        if validate and not drop_bad:
+            batches = quality.tap(batches)
+        if labels is not None:
+            batches = coadd_batches(batches, labels)
+        if convert:
+            batches = convert_batches(batches, reference, convert)
+        return batches
+
+    def spectra_batches():
+        if pipeline:
+            # decoding and post-processing run on the decode thread; the time
+            # charged here is how long the writer waited for a decoded batch
+            batches = pipelined_batches(srs, starts + 4 * cols.start, ncols, batch_frames, release=streaming,
+                                        transform=postprocess)
+        else:
+            batches = iter_spectra_batches(srs, starts + 4 * cols.start, ncols, batch_frames, release=streaming)
+            batches = postprocess(b for _, b in batches)
+        return prof.timed("spectra_matrix", batches)
+
+    # Step 4: 保存时间序列光谱（换算结果以 _absorbance/_transmittance 区分）
+    written = []
     base_name = os.path.splitext(os.path.basename(srs_path))[0]
-    out_ts = os.path.join(outdir, f"{base_name}.txt")
-    if time_axis is not None and len(time_axis) >= spectra.shape[0]:
-        data_with_time = np.column_stack((time_axis[: spectra.shape[0]], spectra))
-        header = "\t" + "\t".join(f"{x:.6f}" for x in wn_axis)
-        np.savetxt(out_ts, data_with_time, delimiter="\t", header=header, comments="", encoding="utf-8")
-    else:
-        header = "\t".join(f"{x:.6f}" for x in wn_axis)
-        np.savetxt(out_ts, spectra, delimiter="\t", header=header,comments="", encoding="utf-8")
-    print(f"📄 已保存时间分辨光谱: {out_ts}")
+    ts_name = f"{base_name}_{convert}" if convert else base_name
+    if out_format == "txt":
+        out_ts = os.path.join(outdir, f"{ts_name}.txt")
+        if has_time:
+            header = "\t" + "\t".join(f"{x:.6f}" for x in wn_axis)
+        else:
+            header = "\t".join(f"{x:.6f}" for x in wn_axis)
+        chunk_rows = min(CHUNK_ROWS, max(1, batch_frames // (2 * write_workers + 1))) if batch_frames else CHUNK_ROWS
+        with prof.stage("timeseries_write") as rec:
+            write_text_batches(out_ts, spectra_batches(), header, first_col=time_col, precision=precision,
+                               chunk_rows=chunk_rows, workers=write_workers)
+            rec["bytes"], rec["frames"] = os.path.getsize(out_ts), n_rows
+        written.append(out_ts)
+        print(f"📄 已保存时间分辨光谱: {out_ts}")
+    elif out_format == "npy":
+        spectra = RowStream((n_rows, ncols), spectra_batches())
+        with prof.stage("timeseries_write") as rec:
+            paths = write_npy_arrays(outdir, ts_name, {"spectra": spectra, "time": time_col, "wavenumber": wn_axis})
+            rec["bytes"], rec["frames"] = sum(os.path.getsize(p) for p in paths), n_rows
+        for path in paths:
+            written.append(path)
+            print(f"📄 已保存: {path}")
     # Step 5: 背景
-    if mode == "fast":
-        bg_offsets = detect_payloads_by_markers(srs)
-        if not bg_offsets:
-            print("未找到背景标记，尝试按间隔扫描 (fallback)")
-            first_guess = 0
-            BG_INTERVAL_BYTES = 9040
-            while first_guess < len(srs) - 10 * BG_INTERVAL_BYTES:
-                arr = np.frombuffer(srs, dtype=np.float32, count=1024, offset=first_guess)
-                if np.isfinite(arr).all() and np.std(arr) > 1e-6:
-                    bg_offsets = [first_guess + i * BG_INTERVAL_BYTES for i in range(3)]
-                    break
-                first_guess += 512
-        if bg_offsets:
-            print("定位到背景 payload 起点:")
-            for i, p in enumerate(bg_offsets, 1):
-                print(f"  BG#{i} @SRS {p}")
-        bg_matrix = extract_background_matrix(srs, bg_offsets, spectra.shape[1])
+    if not convert:
+        bg_matrix = load_background()
+
+    if use_cache and index is None:
+        with prof.stage("index_cache_save"):
+            save_frame_index(srs_path, srs, FrameIndex(mode, payload_offset, frame_positions, time_axis, list(bg_offsets)),
+                             cache_dir)
+
+    if out_format in ("npz", "archive"):
+        out_path = os.path.join(outdir, f"{ts_name}.{'npz' if out_format == 'npz' else 'srsa'}")
+        spectra = RowStream((n_rows, ncols), spectra_batches())
+        arrays = {"time": time_col, "wavenumber": wn_axis, "bg": bg_matrix}
+        # spectra and background go into the same file, so this stage covers both
+        with prof.stage("timeseries_write") as rec:
+            if out_format == "npz":
+                write_npz_arrays(out_path, {"spectra": spectra, **arrays})
+            else:
+                # compressed chunks; write_workers threads compress them
+                write_archive(out_path, spectra, arrays, workers=write_workers,
+                              meta={"source": os.path.basename(srs_path), "mode": mode, "convert": convert})
+            rec["bytes"], rec["frames"] = os.path.getsize(out_path), n_rows
+        written.append(out_path)
+        print(f"📄 已保存: {out_path}")
+        if bg_matrix is None:
+            print("⚠ 未导出背景")
+    elif bg_matrix is None:
+        print("⚠ 未导出背景文件")
+    elif out_format == "npy":
+        with prof.stage("background_write") as rec:
+            paths = write_npy_arrays(outdir, base_name, {"bg": bg_matrix})
+            rec["bytes"] = sum(os.path.getsize(p) for p in paths)
+        for path in paths:
+            written.append(path)
+            print(f"📄 已保存背景文件: {path}")
     else:
-        bg_matrix, _ = extract_background_first(
-            srs,
-            target_npts=spectra.shape[1],
-            interval_bytes=9040,
-            offset_adjust=-404,
-            scan_step=512,
-        )
-
-    if bg_matrix is not None:
         out_bg = os.path.join(outdir, f"{base_name}_bg.txt")
         header = "wavenumber" + "".join([f"\tbg{i+1}" for i in range(bg_matrix.shape[0])])
-        out_mat = np.column_stack([wn_axis, bg_matrix.T])
-        np.savetxt(out_bg, out_mat, delimiter="\t", header=header,
-                   comments="", encoding="utf-8")
+        with prof.stage("background_write") as rec:
+            write_text_matrix(out_bg, bg_matrix.T, header, first_col=wn_axis, precision=precision)
+            rec["bytes"] = os.path.getsize(out_bg)
+        written.append(out_bg)
         print(f"📄 已保存背景文件: {out_bg}")
-    else:
-        print("⚠ 未导出背景文件")
\ No newline at end of file
+
+    if report is not None:
+        if "content" not in report:
+            report["content"] = content_report(quality, frame_ids)
+        out_report = os.path.join(outdir, f"{base_name}_validation.json")
+        write_validation(out_report, report)
+        print_validation(report)
+        written.append(out_report)
+        print(f"📄 已保存校验报告: {out_report}")
+    return written
\ No newline at end of file
@@ -0,0 +1,100 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from .common import FRAME_MARKER_HEX
+from .scanner import scan_markers
+from .bg_fast import marker_needles
+from .header import read_wavenumber_range
+
+# only this many bytes from the start of the file are examined: the background
+# block and a few hundred frames, independent of the file size
+IDENTIFY_SAMPLE_BYTES = 2 << 20
+# frames whose payload start is checked
+IDENTIFY_FRAMES = 64
+# same threshold extract_time_axis uses for the fast-mode pseudo-frame #0
+PSEUDO_FRAME_GAP = 20000
+# bytes after the payload up to the next frame marker
+FRAME_TRAILER_BYTES = 16
+
+
+def _starts_at_80(sample: bytes, frame_pos: np.ndarray, gaps: np.ndarray):
+    """Fraction of frames whose float at +80 continues the spectrum that follows at +84.
+
+    In fast files +80 is already the first spectrum point; in realtime files it is
+    still frame header (usually 0, a small integer read as a subnormal, or garbage).
+    """
+    width = int(min(32, (gaps.min() - 84 - 16) // 4))
+    if width < 4:
+        return None
+    data = np.frombuffer(sample, dtype=np.uint8)
+    idx = (frame_pos + 80)[:, None] + np.arange(4 * (width + 1))
+    vals = np.ascontiguousarray(data[idx]).view("<f4").astype(np.float64)
+    head, body = vals[:, 0], vals[:, 1:]
+    with np.errstate(invalid="ignore", over="ignore"):
+        step = np.nanmedian(np.abs(np.diff(body, axis=1)), axis=1)
+        guess = 2 * body[:, 0] - body[:, 1]
+        tol = 8 * step + 1e-6 * np.abs(body[:, 0])
+        subnormal = (head != 0) & (np.abs(head) < np.finfo(np.float32).tiny)
+        header_zero = (head == 0) & (body[:, 0] != 0)
+        cont = np.isfinite(head) & ~subnormal & ~header_zero & (np.abs(head - guess) <= tol)
+    return float(cont.mean())
+
+
+def identify_srs_type(sample: bytes) -> Tuple[Optional[str], List[str]]:
+    """Guess ``"fast"`` or ``"realtime"`` from the first bytes of a file.
+
+    Votes: fast-mode background markers, the pseudo-frame #0 gap, the frame
+    spacing against the header point count (80 or 84 header bytes + payload +
+    trailer), and whether frame payloads start at byte 80 (fast) or 84
+    (realtime). Returns ``(mode, reasons)``; mode is None when the evidence is
+    missing or tied.
+    """
+    marker = bytes.fromhex(FRAME_MARKER_HEX)
+    hits = scan_markers(sample, [marker] + marker_needles())
+    pos = hits.pop(marker)
+    votes, reasons = 0, []
+
+    n_bg = sum(len(h) for h in hits.values())
+    if n_bg:
+        votes += 1
+        reasons.append(f"背景标记 {n_bg} 处 → fast")
+
+    frame_pos = pos
+    if len(pos) >= 2 and pos[1] - pos[0] > PSEUDO_FRAME_GAP:
+        votes += 2
+        reasons.append(f"首帧间距 {int(pos[1] - pos[0])} B（伪帧 #0）→ fast")
+        frame_pos = pos[1:]
+
+    if len(frame_pos) >= 3:
+        frame_pos = frame_pos[: IDENTIFY_FRAMES + 1]
+        gaps = np.diff(frame_pos)
+        hdr = read_wavenumber_range(sample)
+        if hdr is not None:
+            # the shortest frame holds exactly the header's point count; others may be padded
+            head = int(gaps.min()) - 4 * hdr.npts - FRAME_TRAILER_BYTES
+            if head in (80, 84):
+                votes += 2 if head == 80 else -2
+                reasons.append(f"最短帧间距 {int(gaps.min())} B = {head} + {hdr.npts}×4 + {FRAME_TRAILER_BYTES}"
+                               f" → {'fast' if head == 80 else 'realtime'}")
+        share = _starts_at_80(sample, frame_pos[:-1], gaps)
+        if share is not None and share >= 0.8:
+            votes += 2
+            reasons.append(f"{share:.0%} 帧的 payload 自偏移 80 起连续 → fast")
+        elif share is not None and share <= 0.2:
+            votes -= 2
+            reasons.append(f"{1 - share:.0%} 帧偏移 80 处为帧头，payload 自 84 起 → realtime")
+
+    if votes > 0:
+        return "fast", reasons
+    if votes < 0:
+        return "realtime", reasons
+    return None, reasons or ["样本中未找到可用特征"]
+
+
+def guess_srs_type(srs_path: str) -> str:
+    """Mode of the file at ``srs_path``, from a bounded sample of its start."""
+    with open(srs_path, "rb") as f:
+        sample = f.read(IDENTIFY_SAMPLE_BYTES)
+    mode, reasons = identify_srs_type(sample)
+    if mode is None:
+        raise ValueError(f"无法自动识别文件类型（{'；'.join(reasons)}），请手动指定 --mode fast/realtime")
+    return mode
@@ -0,0 +1,207 @@
+import os
+import time
+import numpy as np
+from typing import Optional
+from .common import FRAME_MARKER_HEX, close_srs, map_srs
+from .scanner import scan_markers
+from .time_axis import parse_time_fields
+from .spectra_matrix import gather_frames
+from .bg_realtime import extract_background_first, find_first_background_offset
+from .writers import append_text_rows, write_text_matrix
+from .header import HEADER_SEARCH_BYTES, resolve_wavenumber_range
+
+# realtime frame payload starts this many bytes after the marker
+REALTIME_PAYLOAD_OFFSET = 84
+# new bytes read per step while catching up with a file that is already large
+FOLLOW_READ_BYTES = 64 << 20
+
+
+class FrameFollower:
+    """Incrementally decode the frames appended to a growing realtime ``.srs``.
+
+    Only the bytes after the last seen frame marker are kept between polls; each
+    poll reads what was appended since, scans just those bytes and returns the
+    frames whose next marker has arrived (i.e. that are complete).
+    """
+
+    def __init__(self, path: str, payload_offset: int = REALTIME_PAYLOAD_OFFSET):
+        self.fh = open(path, "rb")
+        self.marker = bytes.fromhex(FRAME_MARKER_HEX)
+        self.payload_offset = payload_offset
+        self.read_pos = 0  # file offset of the first unread byte
+        self.pending = b""  # bytes from the last seen marker (or the scan tail) on
+        self.scan_from = 0  # offset in pending where the next scan starts
+        self.has_marker = False  # pending starts with a marker
+        self.npts = None
+        self.skipped = 0
+        self.shortest = None  # points of the shortest skipped frame
+        self.first_marker = None  # file offset of the first frame marker
+        self.any_time = False  # some frame (or the pending marker) has a finite time
+
+    def close(self):
+        self.fh.close()
+
+    def poll(self):
+        """Return (time values, spectra) for frames completed since the last poll."""
+        size = os.fstat(self.fh.fileno()).st_size
+        if size < self.read_pos:
+            raise RuntimeError("文件被截断，无法继续跟踪")
+        times, blocks = [], []
+        while self.read_pos < size:
+            self.fh.seek(self.read_pos)
+            new = self.fh.read(min(FOLLOW_READ_BYTES, size - self.read_pos))
+            if not new:
+                break
+            self.read_pos += len(new)
+            t, block = self._consume(new)
+            if block is not None:
+                times.append(t)
+                blocks.append(block)
+        if not blocks:
+            return None, None
+        return np.concatenate(times), np.concatenate(blocks)
+
+    def pending_time_finite(self) -> bool:
+        """Whether the marker of the frame still being written carries a finite time."""
+        if not self.has_marker or len(self.pending) < 16:
+            return False
+        return bool(np.isfinite(parse_time_fields(self.pending, np.zeros(1, dtype=np.int64))).any())
+
+    def _consume(self, new: bytes):
+        buf = self.pending + new
+        found = scan_markers(memoryview(buf)[self.scan_from :], [self.marker])[self.marker] + self.scan_from
+        # markers starting in the last few bytes are rescanned once complete
+        self.scan_from = max(0, len(buf) - (len(self.marker) - 1))
+        positions = np.concatenate(([0], found)) if self.has_marker else found
+        if len(positions) == 0:
+            self.pending, self.scan_from = buf[self.scan_from :], 0
+            return None, None
+        if self.first_marker is None:
+            self.first_marker = self.read_pos - len(buf) + int(positions[0])
+
+        times = block = None
+        if len(positions) >= 2:
+            frame_pos = positions[:-1]
+            nbytes = positions[1:] - 16 - (frame_pos + self.payload_offset)
+            if self.npts is None and (nbytes >= 4).any():
+                # same rule as frame_layout, fixed by the first completed frames
+                self.npts = int(nbytes[nbytes >= 4].min()) // 4
+            if self.npts is not None:
+                ok = nbytes >= 4 * self.npts
+                short = ~ok & (nbytes >= 4)
+                if short.any():
+                    self.skipped += int(short.sum())
+                    least = int(nbytes[short].min()) // 4
+                    self.shortest = least if self.shortest is None else min(self.shortest, least)
+                if ok.any():
+                    times = parse_time_fields(buf, frame_pos[ok])
+                    block = gather_frames(buf, frame_pos[ok] + self.payload_offset, self.npts)
+                    self.any_time = self.any_time or bool(np.isfinite(times).any())
+
+        # the last marker starts a frame that is still being written
+        shift = int(positions[-1])
+        self.pending = buf[shift:]
+        self.scan_from = max(self.scan_from - shift, 1)
+        self.has_marker = True
+        return times, block
+
+
+def follow_extraction(
+    srs_path: str,
+    outdir: str = "output",
+    start_wn: Optional[float] = None,
+    end_wn: Optional[float] = None,
+    precision: int = 18,
+    poll_interval: float = 1.0,
+    idle_timeout: Optional[float] = None,
+):
+    """Tail a realtime ``.srs`` that is still being acquired and append new frames to the text output.
+
+    The finished output equals a full realtime run over the final file, except
+    when frames shorter than the first completed ones arrive later: those are
+    skipped (and reported), where a full run would cut every frame to them.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(srs_path))[0]
+    out_ts = os.path.join(outdir, f"{base_name}.txt")
+    print(f"跟踪模式: {srs_path}（每 {poll_interval:g} 秒检查一次，Ctrl+C 结束）")
+
+    follower = FrameFollower(srs_path)
+    out = None
+    total = 0
+    bg_saved = False
+    last_growth = time.monotonic()
+    try:
+        while True:
+            times, block = follower.poll()
+            if block is not None:
+                if out is None:
+                    # the header is written before the first frame, so it is complete by now
+                    with open(srs_path, "rb") as f:
+                        wn_range = resolve_wavenumber_range(f.read(HEADER_SEARCH_BYTES), start_wn, end_wn,
+                                                            follower.npts)
+                    if wn_range is None:
+                        return
+                    wn_axis = np.linspace(*wn_range, follower.npts)
+                    out = open(out_ts, "w", encoding="utf-8")
+                    out.write("\t" + "\t".join(f"{x:.6f}" for x in wn_axis) + "\n")
+                    # the background precedes the first frame, so those bytes are complete now
+                    bg_saved = _save_background(srs_path, outdir, base_name, follower.npts, wn_axis, precision,
+                                                end=follower.first_marker)
+                append_text_rows(out, block, first_col=times, precision=precision)
+                out.flush()
+                total += len(block)
+                print(f"+{len(block)} 帧（累计 {total}）→ {out_ts}")
+                last_growth = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - last_growth >= idle_timeout:
+                print(f"{idle_timeout:g} 秒内无新帧，结束跟踪")
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("已停止跟踪")
+    finally:
+        follower.close()
+        if out is not None:
+            out.close()
+    if out is not None:
+        if not follower.any_time and not follower.pending_time_finite():
+            # like run_extraction: no valid time at all means no time column
+            _drop_time_column(out_ts)
+        if not bg_saved:
+            # same full-file interval scan as a run_extraction over the file as it is now
+            _save_background(srs_path, outdir, base_name, follower.npts, wn_axis, precision, verbose=True)
+    if follower.skipped:
+        print(f"⚠ 跳过 {follower.skipped} 个短于 {follower.npts} 点的帧；完整提取会保留这些帧，"
+              f"并把所有帧截短到 {follower.shortest} 点")
+    print(f"共写出 {total} 帧")
+
+
+def _save_background(srs_path: str, outdir: str, base_name: str, npts: int, wn_axis: np.ndarray, precision: int,
+                     end: Optional[int] = None, verbose: bool = False) -> bool:
+    # with ``end`` only offsets before it are probed, without the usual margin at the end of the file
+    srs = map_srs(srs_path)
+    try:
+        off = find_first_background_offset(srs, interval_bytes=9040, offset_adjust=-404, scan_step=512, end=end)
+        bg_matrix = extract_background_first(srs, target_npts=npts, offset=off)[0] if off is not None else None
+    finally:
+        close_srs(srs)
+    if off is None:
+        if verbose:
+            print("⚠ 未导出背景文件")
+        return False
+    if bg_matrix is None:
+        return False
+    out_bg = os.path.join(outdir, f"{base_name}_bg.txt")
+    header = "wavenumber" + "".join([f"\tbg{i+1}" for i in range(bg_matrix.shape[0])])
+    write_text_matrix(out_bg, bg_matrix.T, header, first_col=wn_axis, precision=precision)
+    print(f"📄 已保存背景文件: {out_bg}")
+    return True
+
+
+def _drop_time_column(path: str):
+    tmp = path + ".tmp"
+    with open(path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+        dst.write(src.readline()[1:])
+        for line in src:
+            dst.write(line.split("\t", 1)[1])
+    os.replace(tmp, path)
@@ -0,0 +1,74 @@
+import struct
+import sys
+from typing import NamedTuple, Optional, Tuple
+
+# byte pattern that follows the spectral header block in OMNIC .srs files
+HEADER_KEY = b"\x02\x00\x00\x00\x18\x00\x00\x00\x00\x00\x48\x43\x00\x50\x43\x47"
+# the header block starts this many bytes before the key
+HEADER_BACK = 152
+# the header sits near the file start; never search further than this
+HEADER_SEARCH_BYTES = 1 << 20
+
+
+class WavenumberRange(NamedTuple):
+    first: float
+    last: float
+    npts: int
+
+
+def read_wavenumber_range(srs: bytes, search_bytes: int = HEADER_SEARCH_BYTES) -> Optional[WavenumberRange]:
+    """First/last wavenumber (cm⁻¹) and point count from the .srs header, or None.
+
+    Header fields (little-endian, relative to the header start): ``uint32`` point
+    count at +4, ``float32`` first x at +16 and last x at +20. Only the first
+    ``search_bytes`` are searched; implausible values are rejected.
+    """
+    pos = srs[: min(len(srs), search_bytes)].find(HEADER_KEY)
+    if pos < HEADER_BACK:
+        return None
+    hdr = pos - HEADER_BACK
+    (npts,) = struct.unpack_from("<I", srs, hdr + 4)
+    first, last = struct.unpack_from("<2f", srs, hdr + 16)
+    if not (0 < npts < 1 << 24):
+        return None
+    if not all(0.0 <= x < 1e6 for x in (first, last)) or first == last:
+        return None
+    return WavenumberRange(float(first), float(last), int(npts))
+
+
+def can_prompt() -> bool:
+    # input() is only an option with a person at a terminal (not in batch workers, pipes, services)
+    try:
+        return sys.stdin is not None and sys.stdin.isatty()
+    except ValueError:
+        return False
+
+
+def resolve_wavenumber_range(
+    srs: bytes, start_wn: Optional[float], end_wn: Optional[float], npts: int, verbose: bool = True
+) -> Optional[Tuple[float, float]]:
+    """Wavenumber start/end: given values first, then the file header, then a prompt on a terminal.
+
+    Returns None (after printing why) when neither is available.
+    """
+    if start_wn is not None and end_wn is not None:
+        return start_wn, end_wn
+    hdr = read_wavenumber_range(srs)
+    if hdr is not None:
+        if verbose:
+            print(f"文件头波数范围: {hdr.first:.4f} ~ {hdr.last:.4f} cm⁻¹（{hdr.npts} 点）")
+            if npts and hdr.npts != npts:
+                print(f"⚠ 文件头点数 {hdr.npts} 与帧点数 {npts} 不一致，波数轴按帧点数等分")
+        return (hdr.first if start_wn is None else start_wn), (hdr.last if end_wn is None else end_wn)
+    if not can_prompt():
+        print("文件头中未找到波数范围，且无交互终端，请用 --start/--end 指定。终止")
+        return None
+    try:
+        if start_wn is None:
+            start_wn = float(input("请输入波数起点(cm⁻¹): ").strip())
+        if end_wn is None:
+            end_wn = float(input("请输入波数终点(cm⁻¹): ").strip())
+    except Exception:
+        print("波数输入无效。终止")
+        return None
+    return start_wn, end_wn
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+import numpy as np
+from typing import List, NamedTuple, Optional
+
+# bump when the layout or the scan/parse rules behind the cached values change
+INDEX_VERSION = 1
+# content hash samples: this many evenly spread blocks plus the file tail
+HASH_BLOCKS = 16
+HASH_BLOCK_BYTES = 64 << 10
+
+
+class FrameIndex(NamedTuple):
+    """Scan results of one ``.srs`` file, enough to re-export it without rescanning."""
+
+    mode: str
+    payload_offset: int
+    positions: np.ndarray  # frame marker offsets (after the pseudo-frame fix)
+    time_axis: Optional[np.ndarray]
+    bg_offsets: List[int]  # background payload offsets, empty if none were found
+
+
+def default_cache_dir() -> str:
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "srs_extractor")
+
+
+def sampled_hash(srs: bytes) -> str:
+    """blake2b over the size and a bounded, evenly spread sample of the content."""
+    h = hashlib.blake2b(str(len(srs)).encode(), digest_size=16)
+    size = len(srs)
+    if size <= (HASH_BLOCKS + 1) * HASH_BLOCK_BYTES:
+        h.update(srs)
+    else:
+        for st in np.linspace(0, size - HASH_BLOCK_BYTES, HASH_BLOCKS + 1).astype(np.int64):
+            h.update(srs[int(st) : int(st) + HASH_BLOCK_BYTES])
+    return h.hexdigest()
+
+
+def _identity(srs_path: str, srs: bytes, mode: str) -> dict:
+    st = os.stat(srs_path)
+    return {
+        "version": INDEX_VERSION,
+        "path": os.path.abspath(srs_path),
+        "mode": mode,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash": sampled_hash(srs),
+    }
+
+
+def _cache_path(srs_path: str, mode: str, cache_dir: Optional[str]) -> str:
+    key = hashlib.sha1(os.path.abspath(srs_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir or default_cache_dir(), f"{key}_{mode}.npz")
+
+
+def load_frame_index(srs_path: str, srs: bytes, mode: str, cache_dir: Optional[str] = None) -> Optional[FrameIndex]:
+    """Cached index for this exact file content, or None if missing or stale."""
+    path = _cache_path(srs_path, mode, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            stored = {k: z[k].item() for k in ("version", "path", "mode", "size", "mtime_ns", "hash")}
+            if stored != _identity(srs_path, srs, mode):
+                return None
+            # positions are stored as first offset + gaps, which compress to almost nothing
+            positions = np.cumsum(z["gaps"].astype(np.int64))
+            time_axis = z["time_axis"] if bool(z["has_time"]) else None
+            return FrameIndex(mode, int(z["payload_offset"]), positions, time_axis, z["bg_offsets"].tolist())
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_frame_index(srs_path: str, srs: bytes, index: FrameIndex, cache_dir: Optional[str] = None) -> Optional[str]:
+    """Write the index atomically; returns its path, or None if the cache is not writable."""
+    path = _cache_path(srs_path, index.mode, cache_dir)
+    positions = np.asarray(index.positions, dtype=np.int64)
+    gaps = np.diff(positions, prepend=0)
+    if len(gaps) and gaps.max() < 2 ** 31 and gaps.min() >= 0:
+        gaps = gaps.astype(np.int32)
+    arrays = dict(_identity(srs_path, srs, index.mode))
+    arrays.update(
+        payload_offset=index.payload_offset,
+        gaps=gaps,
+        has_time=index.time_axis is not None,
+        time_axis=np.asarray(index.time_axis if index.time_axis is not None else [], dtype=np.float64),
+        bg_offsets=np.asarray(index.bg_offsets, dtype=np.int64),
+    )
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    except OSError:
+        return None
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez_compressed(fh, **{k: np.asarray(v) for k, v in arrays.items()})
+        os.replace(tmp, path)
+    except OSError:
+        # e.g. disk full: don't leave the partial temp file behind
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return None
+    return path
@@ -0,0 +1,113 @@
+import queue
+import threading
+import numpy as np
+from typing import Callable, Iterable, Iterator, Optional
+from .common import prefetch_pages, release_pages
+from .spectra_matrix import frames_view, gather_frames
+
+# items buffered between two pipeline stages
+PIPELINE_DEPTH = 2
+# decoded bytes per batch when no --max-memory budget sets the batch size
+PIPELINE_BATCH_BYTES = 16 << 20
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def threaded(items: Iterable, depth: int = PIPELINE_DEPTH, name: str = "srs-stage") -> Iterator:
+    """Iterate ``items`` on a background thread, handing them over through a bounded queue.
+
+    The producer runs at most ``depth`` items ahead of the consumer. An exception
+    in the producer is re-raised in the consumer; when the consumer stops early
+    (error, ``close()``) the producer is told to stop and joined.
+    """
+    q = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    source = iter(items)
+
+    def run():
+        try:
+            for item in source:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as exc:
+            put(_Failure(exc))
+        finally:
+            # stops upstream stages when this one ends early
+            if hasattr(source, "close"):
+                source.close()
+
+    worker = threading.Thread(target=run, name=name, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def pipeline_batch_frames(npts: int) -> int:
+    return max(1, PIPELINE_BATCH_BYTES // (4 * max(npts, 1)))
+
+
+def pipelined_batches(
+    srs: bytes,
+    starts: np.ndarray,
+    npts: int,
+    batch_frames: Optional[int] = None,
+    release: bool = False,
+    transform: Optional[Callable[[Iterable[np.ndarray]], Iterable[np.ndarray]]] = None,
+    depth: int = PIPELINE_DEPTH,
+) -> Iterator[np.ndarray]:
+    """``iter_spectra_batches`` as a three-stage pipeline; yields float32 batches.
+
+    A reader thread pulls the byte range of upcoming batches into memory, a
+    decode thread copies each batch out of the mmap (and runs ``transform``, e.g.
+    co-adding or conversion, on the decoded stream), and the caller formats and
+    writes. Stages are linked by queues of ``depth`` batches, so the reader is
+    at most about ``2 * depth`` batches ahead of the writer and wall time tends
+    to the slowest stage instead of the sum. With ``release`` the decode stage
+    drops the mmap pages of a batch as soon as it has been copied.
+    """
+    n = len(starts)
+    step = batch_frames or pipeline_batch_frames(npts)
+
+    def regions():
+        for i in range(0, n, step):
+            sel = starts[i : i + step]
+            prefetch_pages(srs, int(sel[0]), int(sel[-1]) + 4 * npts)
+            yield i, sel
+
+    def decoded():
+        view = frames_view(srs, starts, npts)
+        for i, sel in threaded(regions(), depth, name="srs-reader"):
+            block = np.array(view[i : i + len(sel)]) if view is not None else gather_frames(srs, sel, npts)
+            if release:
+                release_pages(srs, int(sel[0]), int(sel[-1]) + 4 * npts)
+            yield block
+
+    batches = decoded()
+    if transform is not None:
+        batches = transform(batches)
+    return threaded(batches, depth, name="srs-decoder")
@@ -0,0 +1,187 @@
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def max_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def json_safe(value):
+    """``value`` with slices as ``[start, stop]`` (``[start, stop, step]``) and tuples/arrays as lists."""
+    if isinstance(value, dict):
+        return {str(k): json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if isinstance(value, slice):
+        return json_safe([value.start, value.stop] + ([value.step] if value.step is not None else []))
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class StageProfiler:
+    """Wall time, data volume and memory of each pipeline stage.
+
+    ``stage(name)`` is a context manager yielding the stage record, so the caller
+    can fill in ``bytes`` / ``frames`` once they are known. Re-entering a name
+    accumulates into the same record, and a stage nested in another counts only
+    for itself: the outer stage reports exclusive time. This lets lazily decoded
+    batches (``timed``) be attributed to decoding while the writer consumes them.
+    The RSS high-water mark is read when a stage ends; with ``trace_memory`` the
+    peak of Python allocations (including NumPy buffers) is traced per stage as
+    well, which slows allocation-heavy stages noticeably.
+    """
+
+    def __init__(self, cprofile: bool = False, trace_memory: bool = False):
+        self.meta: Dict = {}
+        self.stages: Dict[str, Dict] = {}
+        self._stack: List[Dict] = []
+        self._trace = trace_memory
+        self._own_trace = False
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._t0 = None
+        self.seconds = 0.0
+
+    def start(self):
+        if self._trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_trace = True
+        self._t0 = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.seconds = time.perf_counter() - self._t0
+        if self._own_trace:
+            tracemalloc.stop()
+            self._own_trace = False
+
+    def _record(self, name: str) -> Dict:
+        if name not in self.stages:
+            self.stages[name] = {"name": name, "calls": 0, "seconds": 0.0, "bytes": 0, "frames": 0,
+                                 "tracemalloc_peak_bytes": None, "max_rss_bytes": None}
+        return self.stages[name]
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[Dict]:
+        rec = self._record(name)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # carry the enclosing stage's peak so far before restarting the measurement
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._stack:
+                self._stack[-1]["_peak"] = max(self._stack[-1].get("_peak", 0), peak)
+            tracemalloc.reset_peak()
+        frame = {"_peak": 0, "_child": 0.0}
+        self._stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._stack.pop()
+            rec["calls"] += 1
+            rec["seconds"] += elapsed - frame["_child"]
+            if self._stack:
+                self._stack[-1]["_child"] += elapsed
+            if tracing:
+                peak = max(frame["_peak"], tracemalloc.get_traced_memory()[1])
+                rec["tracemalloc_peak_bytes"] = max(rec["tracemalloc_peak_bytes"] or 0, peak)
+                if self._stack:
+                    self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            rec["max_rss_bytes"] = max_rss_bytes()
+
+    def timed(self, name: str, batches: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Yield ``batches`` unchanged, charging the time spent producing them to stage ``name``."""
+        it = iter(batches)
+        while True:
+            with self.stage(name) as rec:
+                batch = next(it, None)
+                if batch is not None:
+                    rec["frames"] += len(batch)
+                    rec["bytes"] += batch.nbytes
+            if batch is None:
+                return
+            yield batch
+
+    def report(self) -> Dict:
+        stages = []
+        for rec in self.stages.values():
+            rec = dict(rec)
+            sec = rec["seconds"]
+            rec["mb_per_s"] = rec["bytes"] / sec / 1e6 if sec > 0 and rec["bytes"] else None
+            rec["frames_per_s"] = rec["frames"] / sec if sec > 0 and rec["frames"] else None
+            stages.append(rec)
+        return {
+            "meta": dict(self.meta),
+            "total_seconds": self.seconds,
+            "max_rss_bytes": max_rss_bytes(),
+            "rss_bytes": current_rss_bytes(),
+            "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                            "platform": platform.platform()},
+            "stages": stages,
+        }
+
+    def write(self, path: str, cprofile_path: Optional[str] = None) -> Dict:
+        report = self.report()
+        # serialized before the file is opened, so a failure leaves no truncated report
+        text = json.dumps(report, ensure_ascii=False, indent=2, default=repr)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if self._cprofile is not None and cprofile_path:
+            self._cprofile.dump_stats(cprofile_path)
+        return report
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; stages cost nothing and batches pass straight through."""
+
+    def __init__(self):
+        self.meta: Dict = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[Dict]:
+        yield {}
+
+    def timed(self, name: str, batches: Iterable[np.ndarray]) -> Iterable[np.ndarray]:
+        return batches
+
+
+def print_report(report: Dict):
+    print(f"⏱ 各阶段耗时（共 {report['total_seconds']:.3f} s）:")
+    for rec in report["stages"]:
+        rate = f"，{rec['mb_per_s']:.1f} MB/s" if rec["mb_per_s"] else ""
+        frames = f"，{rec['frames']} 帧" if rec["frames"] else ""
+        traced = f"，内存峰值 {rec['tracemalloc_peak_bytes'] / 1e6:.1f} MB" if rec["tracemalloc_peak_bytes"] else ""
+        print(f"  {rec['name']:<18} {rec['seconds']:8.3f} s{frames}{rate}{traced}")
+    if report["max_rss_bytes"] is not None:
+        print(f"  峰值 RSS: {report['max_rss_bytes'] / 1e6:.1f} MB")
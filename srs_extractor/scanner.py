@@ -0,0 +1,93 @@
+import numpy as np
+from typing import Dict, Optional, Sequence
+from .common import prefetch_pages, release_pages
+from .pipeline import threaded
+
+# bytes compared per step; small enough that all needles are checked while the chunk is hot
+SCAN_CHUNK_BYTES = 16 << 20
+# byte histogram used to pick anchors is taken from this many evenly spread blocks
+SAMPLE_BLOCKS = 16
+SAMPLE_BLOCK_BYTES = 64 << 10
+
+
+def _byte_frequencies(data: np.ndarray) -> np.ndarray:
+    size = len(data)
+    if size <= SAMPLE_BLOCKS * SAMPLE_BLOCK_BYTES:
+        return np.bincount(data, minlength=256)
+    freq = np.zeros(256, dtype=np.int64)
+    for st in np.linspace(0, size - SAMPLE_BLOCK_BYTES, SAMPLE_BLOCKS).astype(np.int64):
+        freq += np.bincount(data[st : st + SAMPLE_BLOCK_BYTES], minlength=256)
+    return freq
+
+
+def _prefetched(haystack: bytes, chunks, overlap: int):
+    for lo, hi in chunks:
+        prefetch_pages(haystack, lo, hi + overlap)
+        yield lo, hi
+
+
+def scan_markers(
+    haystack: bytes,
+    needles: Sequence[bytes],
+    max_hits: Optional[int] = None,
+    chunk_bytes: int = SCAN_CHUNK_BYTES,
+    release: bool = False,
+    prefetch: bool = False,
+) -> Dict[bytes, np.ndarray]:
+    """Find every (possibly overlapping) occurrence of each needle in one pass.
+
+    The buffer is walked in chunks; in each chunk the rarest byte of every needle
+    (estimated from a bounded sample) selects candidates with one vectorized
+    comparison, and the remaining needle bytes are verified on those candidates only.
+    Returns sorted int64 start positions per needle, as ``find_all`` would.
+    With ``release`` the scanned pages of an mmap are dropped from RSS per chunk;
+    with ``prefetch`` a reader thread pulls the next chunk in while one is scanned.
+    """
+    data = np.frombuffer(haystack, dtype=np.uint8)
+    size = len(data)
+    needles = list(dict.fromkeys(bytes(n) for n in needles))
+    found = {n: [] for n in needles}
+    counts = dict.fromkeys(needles, 0)
+    if size == 0 or not needles:
+        return {n: np.empty(0, dtype=np.int64) for n in needles}
+
+    freq = _byte_frequencies(data)
+    anchors = {}
+    for n in needles:
+        nb = np.frombuffer(n, dtype=np.uint8)
+        k = int(np.argmin(freq[nb]))
+        anchors.setdefault(int(nb[k]), []).append((n, nb, k))
+    overlap = max(map(len, needles)) - 1
+
+    chunks = ((lo, min(size, lo + chunk_bytes)) for lo in range(0, size, chunk_bytes))
+    if prefetch:
+        chunks = threaded(_prefetched(haystack, chunks, overlap), depth=1, name="srs-scan-reader")
+    for lo, hi in chunks:
+        ext = data[lo : min(size, hi + overlap)]
+        for value, group in anchors.items():
+            hits = np.flatnonzero(ext == value)
+            if len(hits) == 0:
+                continue
+            for n, nb, k in group:
+                if max_hits is not None and counts[n] >= max_hits:
+                    continue
+                s = hits - k
+                s = s[(s >= 0) & (s < hi - lo) & (s + len(n) <= len(ext))]
+                for j in range(len(n)):
+                    if j != k and len(s):
+                        s = s[ext[s + j] == nb[j]]
+                if len(s):
+                    found[n].append(s + lo)
+                    counts[n] += len(s)
+        if release:
+            release_pages(haystack, lo, hi)
+        if max_hits is not None and all(c >= max_hits for c in counts.values()):
+            break
+    if prefetch:
+        chunks.close()
+
+    out = {}
+    for n in needles:
+        arr = np.concatenate(found[n]) if found[n] else np.empty(0, dtype=np.int64)
+        out[n] = arr[:max_hits] if max_hits is not None else arr
+    return out
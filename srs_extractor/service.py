@@ -0,0 +1,436 @@
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+from .batch import _extract_one
+from .cli import parse_bg_ref, parse_frame_range
+from .common import parse_size
+
+# TCP fallback where Unix sockets are unavailable; always bound to localhost
+DEFAULT_PORT = 47615
+# finished jobs kept for status queries
+JOB_HISTORY = 1000
+# a request line longer than this is rejected
+MAX_REQUEST_BYTES = 1 << 20
+# run_extraction keyword arguments a job may set; everything a job writes goes
+# into its outdir (no cache_dir or profile report paths)
+JOB_OPTIONS = {
+    "mode", "outdir", "start_wn", "end_wn", "precision", "write_workers", "out_format", "max_memory",
+    "use_cache", "frames", "stride", "time_range", "crop", "coadd", "time_bin", "convert",
+    "bg_ref", "pipeline", "validate", "drop_bad",
+}
+
+Address = Union[str, Tuple[str, int]]
+
+
+def default_address() -> Address:
+    # Windows has AF_UNIX but no getuid to keep the socket per user
+    if hasattr(socket, "AF_UNIX") and hasattr(os, "getuid"):
+        root = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+        return os.path.join(root, f"srs_extractor-{os.getuid()}.sock")
+    return ("127.0.0.1", DEFAULT_PORT)
+
+
+def token_path(address: Address) -> str:
+    """Where the service started on ``address`` keeps its access token.
+
+    Next to a Unix socket; for TCP in ``$XDG_RUNTIME_DIR`` or ``~/.srs_extractor``,
+    which only the user can read.
+    """
+    if not isinstance(address, tuple):
+        return f"{address}.token"
+    root = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".srs_extractor")
+    return os.path.join(root, f"srs_extractor-{address[0]}-{address[1]}.token")
+
+
+def read_token(address: Address) -> str:
+    with open(token_path(address), encoding="ascii") as fh:
+        return fh.read().strip()
+
+
+def _write_token(path: str) -> str:
+    # a fresh secret per start; mkstemp creates the file readable by this user only
+    token = secrets.token_hex(32)
+    root = os.path.dirname(path)
+    os.makedirs(root, mode=0o700, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=root)
+    try:
+        with os.fdopen(fd, "w", encoding="ascii") as fh:
+            fh.write(token)
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        raise
+    return token
+
+
+def parse_address(text: str) -> Address:
+    # "/run/user/1000/srs.sock" or "127.0.0.1:47615" / ":47615"
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return text
+
+
+def job_options(request: Dict) -> Dict:
+    """run_extraction keyword arguments of a submit request (strings parsed like the CLI)."""
+    unknown = set(request) - JOB_OPTIONS - {"cmd", "path", "wait", "timeout"}
+    if unknown:
+        raise ValueError(f"unknown job options: {', '.join(sorted(unknown))}")
+    opts = {k: request[k] for k in JOB_OPTIONS if k in request}
+    opts.setdefault("mode", "auto")
+    if opts["mode"] not in ("fast", "realtime", "auto"):
+        raise ValueError(f"unknown mode {opts['mode']!r}")
+    if isinstance(opts.get("max_memory"), str):
+        opts["max_memory"] = parse_size(opts["max_memory"])
+    if isinstance(opts.get("frames"), str):
+        opts["frames"] = parse_frame_range(opts["frames"])
+    if "bg_ref" in opts:
+        opts["bg_ref"] = parse_bg_ref(str(opts["bg_ref"]))
+    for key in ("time_range", "crop"):
+        if opts.get(key) is not None:
+            lo, hi = opts[key]
+            opts[key] = (float(lo), float(hi))
+    return opts
+
+
+def _warm_worker():
+    # paid once per worker process instead of once per file
+    from .writers import _scale_table
+
+    _scale_table()
+
+
+def _ready():
+    return os.getpid()
+
+
+class ExtractionService:
+    """Job queue in front of a persistent process pool running ``run_extraction``.
+
+    Workers are started (and their imports and formatting tables warmed) once,
+    so a job costs only the extraction itself; the frame-index cache and the OS
+    page cache stay warm across jobs. A crashed worker fails its job and the
+    pool is rebuilt for the next one.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Dict] = {}
+        self._done: Dict[int, threading.Event] = {}
+        self._futures = {}
+        self._next_id = 1
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        return self._pool
+
+    def warm_up(self):
+        pool = self._executor()
+        for fut in [pool.submit(_ready) for _ in range(self.workers)]:
+            fut.result()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, request: Dict) -> Dict:
+        path = request.get("path")
+        if not path or not os.path.isfile(path):
+            raise ValueError(f"no such file: {path!r}")
+        options = job_options(request)
+        path = os.path.abspath(path)
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = {"id": job_id, "path": path, "status": "queued", "submitted": time.time(),
+                                  "options": {k: repr(v) if isinstance(v, slice) else v for k, v in options.items()}}
+            self._done[job_id] = threading.Event()
+            fut = self._executor().submit(_extract_one, path, options)
+            self._futures[job_id] = fut
+        fut.add_done_callback(lambda f, job_id=job_id: self._finish(job_id, f))
+        return self.status(job_id)
+
+    def _finish(self, job_id: int, fut):
+        now = time.time()
+        update = {"finished": now}
+        try:
+            res = fut.result()
+            update.update(status="done" if res.error is None else "failed", run_seconds=res.seconds,
+                          written=res.written, error=res.error, log=res.log)
+        except CancelledError:
+            update.update(status="cancelled", error="service shut down")
+        except BrokenProcessPool:
+            update.update(status="failed", error="worker process died")
+            with self._lock:
+                self._pool = None
+        except Exception as exc:
+            update.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(update)
+            job["total_seconds"] = now - job["submitted"]
+            if "run_seconds" in job:
+                job["queue_seconds"] = max(0.0, job["total_seconds"] - job["run_seconds"])
+            self._futures.pop(job_id, None)
+            self._done[job_id].set()
+            finished = [i for i, j in self._jobs.items() if "finished" in j]
+            for old in finished[: max(0, len(finished) - JOB_HISTORY)]:
+                del self._jobs[old], self._done[old]
+
+    def status(self, job_id: int) -> Dict:
+        with self._lock:
+            if job_id not in self._jobs:
+                raise KeyError(f"unknown job {job_id}")
+            job = dict(self._jobs[job_id])
+            fut = self._futures.get(job_id)
+        if job["status"] == "queued" and fut is not None and fut.running():
+            job["status"] = "running"
+        return job
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Dict:
+        with self._lock:
+            if job_id not in self._done:
+                raise KeyError(f"unknown job {job_id}")
+            done = self._done[job_id]
+        done.wait(timeout)
+        return self.status(job_id)
+
+    def jobs(self) -> List[Dict]:
+        with self._lock:
+            ids = list(self._jobs)
+        brief = ("id", "path", "status", "total_seconds", "run_seconds", "error")
+        out = []
+        for i in ids:
+            try:
+                out.append({k: v for k, v in self.status(i).items() if k in brief})
+            except KeyError:  # dropped from the history meanwhile
+                pass
+        return out
+
+    def info(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for job in self.jobs():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"pid": os.getpid(), "workers": self.workers, "uptime": time.time() - self.started, "jobs": counts}
+
+    def handle(self, request: Dict) -> Dict:
+        """One protocol request → response; errors are reported, never raised."""
+        cmd = request.get("cmd")
+        try:
+            if cmd == "submit":
+                job = self.submit(request)
+                if request.get("wait"):
+                    job = self.wait(job["id"], request.get("timeout"))
+                return {"ok": True, "job": job}
+            if cmd == "status":
+                return {"ok": True, "job": self.status(int(request["job"]))}
+            if cmd == "wait":
+                return {"ok": True, "job": self.wait(int(request["job"]), request.get("timeout"))}
+            if cmd == "list":
+                return {"ok": True, "jobs": self.jobs()}
+            if cmd == "ping":
+                return {"ok": True, **self.info()}
+            if cmd == "shutdown":
+                return {"ok": True}
+            return {"ok": False, "error": f"unknown cmd {cmd!r}"}
+        except (KeyError, ValueError, TypeError, argparse.ArgumentTypeError) as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # one JSON object per line in each direction; a connection may carry many requests,
+    # each carrying the service token; a wrong or missing token ends the connection
+    def handle(self):
+        for line in iter(lambda: self.rfile.readline(MAX_REQUEST_BYTES), b""):
+            if not line.strip():
+                continue
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as exc:
+                response = {"ok": False, "error": f"bad request: {exc}"}
+            else:
+                token = request.pop("token", None)
+                if not isinstance(token, str) or not hmac.compare_digest(token, self.server.token):
+                    self._reply({"ok": False, "error": "unauthorized"})
+                    return
+                response = self.server.service.handle(request)
+            self._reply(response)
+            if request is not None and response.get("ok") and request.get("cmd") == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+    def _reply(self, response: Dict):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    # SO_REUSEADDR on Windows would let a second server bind the same port
+    allow_reuse_address = not hasattr(socket, "SO_EXCLUSIVEADDRUSE")
+
+    def server_bind(self):
+        if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        super().server_bind()
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def _claim_socket_path(path: str):
+    # a leftover socket file from a crashed daemon is removed; a live daemon is not replaced
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"a service is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def serve(address: Optional[Address] = None, workers: Optional[int] = None):
+    """Run the extraction service until a ``shutdown`` request or Ctrl+C.
+
+    Clients must send the token written to ``token_path(address)`` with every
+    request (``request`` does this), so other users and web pages that can reach
+    a TCP port cannot submit jobs. Port 0 picks a free port.
+    """
+    address = address or default_address()
+    service = ExtractionService(workers)
+    if isinstance(address, tuple):
+        server = _TCPServer(address, _Handler)
+        address = server.server_address[:2]
+    else:
+        _claim_socket_path(address)
+        old_umask = os.umask(0o177)  # socket usable by this user only
+        try:
+            server = _UnixServer(address, _Handler)
+        finally:
+            os.umask(old_umask)
+    server.service = service
+    tokens = token_path(address)
+    try:
+        server.token = _write_token(tokens)
+        print(f"提取服务启动中（{service.workers} 个工作进程）...")
+        service.warm_up()
+        print(f"提取服务已就绪: {address}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for path in ([] if isinstance(address, tuple) else [address]) + [tokens]:
+            if os.path.exists(path):
+                os.unlink(path)
+        service.close()
+        print("提取服务已停止")
+
+
+def request(
+    message: Dict, address: Optional[Address] = None, timeout: Optional[float] = None, token: Optional[str] = None
+) -> Dict:
+    """Send one request to a running service and return its response.
+
+    ``token`` defaults to the one the service wrote to ``token_path(address)``.
+    """
+    address = address or default_address()
+    token = token if token is not None else read_token(address)
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall(json.dumps({**message, "token": token}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("service closed the connection")
+    return json.loads(line)
+
+
+def _parse_value(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident extraction service for Omnic SRS files (JSON over a local socket)")
+    parser.add_argument("--address", type=parse_address,
+                        help="Unix socket path or HOST:PORT (default: $XDG_RUNTIME_DIR/srs_extractor-UID.sock, "
+                             f"or 127.0.0.1:{DEFAULT_PORT} without Unix sockets)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="Start the service in the foreground")
+    p_serve.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p_submit = sub.add_parser("submit", help="Queue an extraction job")
+    p_submit.add_argument("path", help="Path to .srs file (as seen by the service)")
+    p_submit.add_argument("--mode", choices=["fast", "realtime", "auto"], default="auto", help="SRS format (default auto)")
+    p_submit.add_argument("--outdir", default="output", help="Output directory for results")
+    p_submit.add_argument("--start", type=float, help="Wavenumber start (cm⁻¹); default: file header")
+    p_submit.add_argument("--end", type=float, help="Wavenumber end (cm⁻¹); default: file header")
+    p_submit.add_argument("--format", choices=["txt", "npy", "npz", "archive"], default="txt", help="Output format")
+    p_submit.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                          help="Any other run_extraction option, value as JSON (e.g. coadd=4, crop=[1000,3000])")
+    p_submit.add_argument("--wait", action="store_true", help="Block until the job has finished")
+    for name in ("status", "wait"):
+        p = sub.add_parser(name, help=f"{name.capitalize()} a job")
+        p.add_argument("job", type=int, help="Job id returned by submit")
+    sub.add_parser("list", help="List recent jobs")
+    sub.add_parser("ping", help="Check that the service is running")
+    sub.add_parser("shutdown", help="Stop the service after the running jobs")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.address, args.workers)
+        return
+    message = {"cmd": args.command}
+    if args.command == "submit":
+        outdir = os.path.abspath(args.outdir)
+        message.update(path=os.path.abspath(args.path), mode=args.mode, outdir=outdir, out_format=args.format,
+                       wait=args.wait)
+        if args.start is not None:
+            message["start_wn"] = args.start
+        if args.end is not None:
+            message["end_wn"] = args.end
+        for item in args.set:
+            key, sep, value = item.partition("=")
+            if not sep:
+                parser.error(f"--set expects KEY=VALUE, got {item!r}")
+            message[key.strip()] = _parse_value(value)
+    elif args.command in ("status", "wait"):
+        message["job"] = args.job
+    try:
+        response = request(message, args.address)
+    except OSError as exc:
+        raise SystemExit(f"无法连接提取服务: {exc}")
+    print(json.dumps(response, ensure_ascii=False, indent=2))
+    if not response.get("ok") or response.get("job", {}).get("status") == "failed":
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
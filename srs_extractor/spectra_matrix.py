@@ -1,5 +1,210 @@
 import numpy as np
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from .common import release_pages
+
+# rows gathered per np.take call for irregularly spaced frames (bounds the index array)
+GATHER_ROWS = 4096
+
+
+def frame_payloads(frame_positions: List[int], payload_offset: int, max_frames: Optional[int] = None):
+    """Byte offset and point count of every usable frame payload."""
+    pos = np.asarray(frame_positions, dtype=np.int64)
+    N = len(pos) - 1
+    if max_frames:
+        N = min(N, max_frames)
+    if N <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # drop last 16 bytes; payload starts at offset
+    starts = pos[:N] + payload_offset
+    nbytes = (pos[1 : N + 1] - 16) - starts
+    keep = nbytes >= 4
+    return starts[keep], nbytes[keep] // 4
+
+
+def frame_layout(frame_positions: List[int], payload_offset: int, max_frames: Optional[int] = None):
+    """Byte offsets of every usable frame payload and the common point count."""
+    starts, points = frame_payloads(frame_positions, payload_offset, max_frames)
+    if len(starts) == 0:
+        return starts, 0
+    return starts, int(points.min())
+
+
+def select_frames(
+    n_frames: int,
+    frames: Optional[slice] = None,
+    stride: int = 1,
+    time_axis: Optional[np.ndarray] = None,
+    time_range: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """Row indices kept by an index range, then a time window (inclusive, NaN times
+    never match), then every ``stride``-th of the remaining frames."""
+    rows = np.arange(*(frames or slice(None)).indices(n_frames), dtype=np.int64)
+    if time_range is not None:
+        lo, hi = sorted(time_range)
+        t = np.asarray(time_axis)[rows]
+        rows = rows[(t >= lo) & (t <= hi)]
+    return rows[:: max(1, int(stride))]
+
+
+def crop_columns(wn_axis: np.ndarray, low: float, high: float) -> Optional[Tuple[int, int]]:
+    """Column range ``[c0, c1)`` of a monotonic wavenumber axis inside ``[low, high]``, or None."""
+    low, high = sorted((low, high))
+    idx = np.flatnonzero((wn_axis >= low) & (wn_axis <= high))
+    if len(idx) == 0:
+        return None
+    return int(idx[0]), int(idx[-1]) + 1
+
+
+def gather_frames(srs: bytes, starts: np.ndarray, npts: int, out: Optional[np.ndarray] = None):
+    """Copy ``npts`` float32 values at each byte offset in ``starts`` with bulk np.take calls."""
+    starts = np.asarray(starts, dtype=np.int64)
+    if out is None:
+        out = np.empty((len(starts), npts), dtype=np.float32)
+    cols = np.arange(npts, dtype=np.int64)
+    for r in np.unique(starts % 4):
+        f32 = np.frombuffer(srs, dtype=np.float32, count=(len(srs) - int(r)) // 4, offset=int(r))
+        rows = np.flatnonzero(starts % 4 == r)
+        for i in range(0, len(rows), GATHER_ROWS):
+            sel = rows[i : i + GATHER_ROWS]
+            idx = ((starts[sel] - r) // 4)[:, None] + cols
+            out[sel] = np.take(f32, idx)
+    return out
+
+
+def frames_view(srs: bytes, starts: np.ndarray, npts: int):
+    """Zero-copy (frames, npts) view when payloads are evenly spaced, otherwise None."""
+    if len(starts) == 0:
+        return None
+    gaps = np.diff(starts)
+    if len(gaps) and not (gaps == gaps[0]).all():
+        return None
+    stride = int(gaps[0]) if len(gaps) else npts * 4
+    if stride <= 0:
+        return None
+    return np.ndarray(
+        shape=(len(starts), npts),
+        dtype=np.float32,
+        buffer=srs,
+        offset=int(starts[0]),
+        strides=(stride, 4),
+    )
+
+
+def iter_spectra_batches(
+    srs: bytes,
+    starts: np.ndarray,
+    npts: int,
+    batch_frames: Optional[int] = None,
+    release: bool = False,
+):
+    """Yield ``(first_row, batch)`` float32 blocks of at most ``batch_frames`` frames.
+
+    Evenly spaced frames are yielded as slices of the strided view, others are
+    gathered per batch, so only one batch is materialized at a time. With
+    ``release`` the mmap pages behind a batch are dropped once it is consumed.
+    """
+    n = len(starts)
+    step = batch_frames or max(n, 1)
+    view = frames_view(srs, starts, npts)
+    for i in range(0, n, step):
+        sel = starts[i : i + step]
+        yield i, (view[i : i + step] if view is not None else gather_frames(srs, sel, npts))
+        if release:
+            release_pages(srs, int(sel[0]), int(sel[-1]) + 4 * npts)
+
+
+def bin_labels(
+    n_frames: int,
+    coadd: Optional[int] = None,
+    time_axis: Optional[np.ndarray] = None,
+    time_bin: Optional[float] = None,
+) -> np.ndarray:
+    """Output row of every frame: blocks of ``coadd`` consecutive frames, or runs of
+    consecutive frames falling in the same ``time_bin``-wide time interval.
+
+    Time bins are counted from the first finite time; frames without a finite
+    time stay in the current bin. Labels are consecutive integers from 0.
+    """
+    if time_bin:
+        t = np.asarray(time_axis, dtype=np.float64)[:n_frames]
+        finite = np.isfinite(t)
+        if not finite.any():
+            return np.zeros(n_frames, dtype=np.int64)
+        b = np.floor((t - t[finite][0]) / time_bin)
+        # carry the last finite bin forward (and the first one backward) over NaN times
+        last = np.maximum.accumulate(np.where(finite, np.arange(n_frames), -1))
+        b = b[np.where(last >= 0, last, np.argmax(finite))]
+        return np.concatenate(([0], np.cumsum(b[1:] != b[:-1])))
+    return np.arange(n_frames, dtype=np.int64) // max(1, int(coadd or 1))
+
+
+def bin_means(values: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Mean of the finite values in each label run (NaN if a run has none)."""
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    sums = np.add.reduceat(np.where(finite, values, 0.0), starts)
+    counts = np.add.reduceat(finite.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def coadd_batches(batches, labels: np.ndarray):
+    """Average consecutive rows sharing a label while streaming ``batches``.
+
+    Each batch is reduced with one ``np.add.reduceat`` (accumulated in float64);
+    a group cut by a batch boundary is carried into the next batch. Yields
+    float32 blocks of averaged rows.
+    """
+    row = 0
+    carry_sum, carry_n, carry_label = None, 0, None
+    for block in batches:
+        if len(block) == 0:
+            continue
+        lab = labels[row : row + len(block)]
+        row += len(block)
+        starts = np.flatnonzero(np.r_[True, lab[1:] != lab[:-1]])
+        sums = np.add.reduceat(block, starts, axis=0, dtype=np.float64)
+        counts = np.diff(np.r_[starts, len(lab)])
+        out = []
+        if carry_sum is not None:
+            if lab[0] == carry_label:
+                sums[0] += carry_sum
+                counts[0] += carry_n
+            else:
+                out.append((carry_sum / carry_n)[np.newaxis])
+        # the last group may continue in the next batch
+        carry_sum, carry_n, carry_label = sums[-1], counts[-1], lab[-1]
+        out.append(sums[:-1] / counts[:-1, np.newaxis])
+        done = np.concatenate(out)
+        if len(done):
+            yield done.astype(np.float32)
+    if carry_sum is not None:
+        yield (carry_sum / carry_n)[np.newaxis].astype(np.float32)
+
+
+def reference_spectrum(bg_matrix: np.ndarray, row: Optional[int] = None) -> np.ndarray:
+    """Background row ``row`` (0-based) or, if None, the mean of all background rows, as float32."""
+    bg = np.asarray(bg_matrix, dtype=np.float32)
+    return bg[row].copy() if row is not None else bg.mean(axis=0, dtype=np.float64).astype(np.float32)
+
+
+def convert_batches(batches, reference: np.ndarray, kind: str):
+    """Turn single-beam batches into transmittance ``S/BG`` or absorbance ``-log10(S/BG)``.
+
+    Computed in float32 per batch; only the derived batch is materialized.
+    Non-positive ratios give NaN/inf like the plain NumPy expression would.
+    """
+    if kind not in ("absorbance", "transmittance"):
+        raise ValueError(f"unknown conversion {kind!r}")
+    reference = np.asarray(reference, dtype=np.float32)
+    for block in batches:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.divide(block, reference, dtype=np.float32)
+            if kind == "absorbance":
+                np.log10(out, out=out)
+                np.negative(out, out=out)
+        yield out
 
 
 def extract_spectra_matrix(
@@ -7,32 +212,20 @@ def extract_spectra_matrix(
     frame_positions: List[int],
     payload_offset: int,
     max_frames: Optional[int] = None,
+    coadd: Optional[int] = None,
 ):
     if len(frame_positions) < 2:
         print("帧标记不足，跳过光谱导出")
         return None
-    frames = []
-    N = len(frame_positions) - 1
-    if max_frames:
-        N = min(N, max_frames)
-
-    for i in range(N):
-        start = frame_positions[i]
-        end = frame_positions[i + 1]
-        if end <= start:
-            continue
-        # drop last 16 bytes; payload starts at offset
-        block = srs[start : end - 16]
-        payload = block[payload_offset:]
-        arr = np.frombuffer(payload, dtype=np.float32)
-        if arr.size > 0:
-            frames.append(arr)
-
-    if not frames:
+    starts, npts = frame_layout(frame_positions, payload_offset, max_frames)
+    if len(starts) == 0:
         print("未解析到帧数据")
         return None
 
-    min_len = min(map(len, frames))
-    M = np.stack([f[:min_len] for f in frames])
+    M = frames_view(srs, starts, npts)
+    if M is None:
+        M = gather_frames(srs, starts, npts)
+    if coadd and coadd > 1:
+        M = np.concatenate(list(coadd_batches([M], bin_labels(len(M), coadd=coadd))))
     print(f"光谱矩阵形状: {M.shape} （行=帧，列=波数点）")
     return M
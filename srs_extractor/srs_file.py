@@ -0,0 +1,224 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from .common import FRAME_MARKER_HEX, close_srs, map_srs
+from .scanner import scan_markers
+from .time_axis import extract_time_axis
+from .spectra_matrix import frame_payloads, gather_frames, iter_spectra_batches, select_frames
+from .bg_fast import marker_needles
+from .index_cache import load_frame_index
+from .file_identify import guess_srs_type
+from .extract_core import locate_background, read_background
+from .header import WavenumberRange, read_wavenumber_range
+from .validate import FrameQuality, content_report, length_report, time_report
+
+
+class SrsFile:
+    """Lazy, side-effect free access to one ``.srs`` file.
+
+    Opening does no I/O (``mode="auto"`` only reads a bounded sample of the
+    file start to pick the mode). The frame index (one marker scan, or a still valid
+    cached index from an earlier ``run_extraction``) is built on first access to
+    frame data, the background only when ``background`` is read. Frames are
+    decoded on demand straight from the memory-mapped file; nothing is printed
+    and no files are written.
+
+        with SrsFile("run.srs", mode="realtime") as f:
+            block = f.spectra[1000:2000]    # (1000, npts) float32
+            t = f.time_axis[1000:2000]
+    """
+
+    def __init__(self, path: str, mode: str = "fast", use_cache: bool = True, cache_dir: Optional[str] = None):
+        if mode == "auto":
+            mode = guess_srs_type(path)
+        if mode not in ("fast", "realtime"):
+            raise ValueError(f"unknown mode {mode!r} (expected 'fast', 'realtime' or 'auto')")
+        self.path = path
+        self.mode = mode
+        self.payload_offset = 80 if mode == "fast" else 84
+        self._use_cache = use_cache
+        self._cache_dir = cache_dir
+        self._srs = None
+        self._hits = None
+        self._starts = None
+        self._npts = 0
+        self._points = None
+        self._time_axis = None
+        self._bg_offsets = None
+        self._background = None
+        self._background_done = False
+
+    def __repr__(self):
+        state = f"{self.n_frames} frames x {self.npts} points" if self._starts is not None else "not indexed"
+        return f"SrsFile({self.path!r}, mode={self.mode!r}, {state})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        close_srs(self._srs)
+        self._srs = None
+
+    @property
+    def raw(self):
+        """The memory-mapped file contents (bytes for empty files)."""
+        if self._srs is None:
+            self._srs = map_srs(self.path)
+        return self._srs
+
+    def _index(self):
+        if self._starts is not None:
+            return
+        index = load_frame_index(self.path, self.raw, self.mode, self._cache_dir) if self._use_cache else None
+        if index is not None:
+            time_axis, positions, self._bg_offsets = index.time_axis, index.positions, index.bg_offsets
+        else:
+            marker = bytes.fromhex(FRAME_MARKER_HEX)
+            needles = [marker] + (marker_needles() if self.mode == "fast" else [])
+            self._hits = scan_markers(self.raw, needles)
+            time_axis, positions = extract_time_axis(self.raw, marker, self.mode, positions=self._hits[marker],
+                                                     verbose=False)
+        if len(positions) >= 2:
+            self._starts, self._points = frame_payloads(positions, self.payload_offset)
+        else:
+            self._starts = self._points = np.empty(0, dtype=np.int64)
+        self._npts = int(self._points.min()) if len(self._points) else 0
+        n = len(self._starts)
+        # same rule as run_extraction: the time column is used only if it covers every frame
+        if time_axis is not None and len(time_axis) >= n:
+            self._time_axis = np.asarray(time_axis[:n], dtype=float)
+
+    @property
+    def n_frames(self) -> int:
+        self._index()
+        return len(self._starts)
+
+    @property
+    def npts(self) -> int:
+        """Points per spectrum (shortest frame payload, as in the extracted matrix)."""
+        self._index()
+        return self._npts
+
+    @property
+    def frame_offsets(self) -> np.ndarray:
+        """Byte offset of every frame payload."""
+        self._index()
+        return self._starts
+
+    @property
+    def time_axis(self) -> Optional[np.ndarray]:
+        """Time/potential value of every frame, or None if the file has none."""
+        self._index()
+        return self._time_axis
+
+    @property
+    def header_range(self) -> Optional[WavenumberRange]:
+        """First/last wavenumber and point count stored in the file header, or None."""
+        return read_wavenumber_range(self.raw)
+
+    @property
+    def wavenumbers(self) -> Optional[np.ndarray]:
+        """Wavenumber of every column (from the file header, ``npts`` evenly spaced points), or None."""
+        hdr = self.header_range
+        return None if hdr is None else np.linspace(hdr.first, hdr.last, self.npts)
+
+    def frame(self, i: int) -> np.ndarray:
+        """Spectrum of frame ``i`` (negative indices count from the end)."""
+        n = self.n_frames
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f"frame index out of range (n_frames={n})")
+        return np.frombuffer(self.raw, dtype=np.float32, count=self._npts, offset=int(self._starts[i])).copy()
+
+    def select(
+        self, frames: Optional[slice] = None, stride: int = 1, time_range: Optional[Tuple[float, float]] = None
+    ) -> np.ndarray:
+        """Frame indices for an index range / time window / stride, usable as ``spectra[rows]``."""
+        if time_range is not None and self.time_axis is None:
+            raise ValueError("file has no time axis")
+        return select_frames(self.n_frames, frames, stride, self.time_axis, time_range)
+
+    def validate(self, rows=None, batch_frames: int = 4096) -> Tuple[dict, np.ndarray]:
+        """Quality report of the selected frames and a mask of the bad ones (NaN/Inf or flat).
+
+        Decodes the frames in batches of ``batch_frames``; the report also covers
+        frame lengths and the time axis, as ``run_extraction(validate=True)`` does.
+        """
+        self._index()
+        ids = np.arange(self.n_frames)[rows if rows is not None else slice(None)]
+        quality = FrameQuality(len(ids))
+        for _, block in iter_spectra_batches(self.raw, self._starts[ids], self._npts, batch_frames):
+            quality.update(block)
+        report = {
+            "lengths": length_report(self._points[ids], self._npts, ids),
+            "time": time_report(None if self._time_axis is None else self._time_axis[ids], ids),
+            "content": content_report(quality, ids),
+        }
+        return report, quality.bad
+
+    @property
+    def spectra(self) -> "SpectraView":
+        return SpectraView(self)
+
+    @property
+    def background_offsets(self) -> List[int]:
+        self._index()
+        if self._bg_offsets is None:
+            self._bg_offsets = locate_background(self.raw, self.mode, self._hits, verbose=False)
+        return self._bg_offsets
+
+    @property
+    def background(self) -> Optional[np.ndarray]:
+        """(n_bg, npts) background spectra, or None if no background was found."""
+        if not self._background_done:
+            bg = read_background(self.raw, self.mode, self.background_offsets, self.npts, verbose=False)
+            self._background = None if bg is None else np.array(bg, dtype=np.float32)
+            self._background_done = True
+        return self._background
+
+
+class SpectraView:
+    """``(n_frames, npts)`` matrix-like view of an ``SrsFile``; indexing decodes only the selected frames."""
+
+    def __init__(self, srs_file: SrsFile):
+        self._file = srs_file
+
+    @property
+    def shape(self):
+        return (self._file.n_frames, self._file.npts)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    def __len__(self):
+        return self._file.n_frames
+
+    def __getitem__(self, key):
+        rows, cols = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if len(cols) > 1:
+            raise IndexError(f"too many indices for spectra: 2-dimensional, but {len(key)} were indexed")
+        f = self._file
+        first, width = 0, f.npts
+        if len(cols) == 1 and isinstance(cols[0], slice):
+            span = range(*cols[0].indices(f.npts))
+            if span.step == 1:
+                # contiguous columns: read only their bytes from each frame
+                first, width, cols = span.start, len(span), ()
+        if isinstance(rows, (int, np.integer)):
+            n = f.n_frames
+            if not -n <= rows < n:
+                raise IndexError(f"frame index out of range (n_frames={n})")
+            start = int(f.frame_offsets[rows]) + 4 * first
+            out = np.frombuffer(f.raw, dtype=np.float32, count=width, offset=start).copy()
+        else:
+            out = gather_frames(f.raw, f.frame_offsets[rows] + 4 * first, width)
+            cols = (slice(None),) + cols if cols else ()
+        return out[cols] if cols else out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[:]
+        return out if dtype is None else out.astype(dtype)
@@ -0,0 +1,176 @@
+import argparse
+import struct
+import numpy as np
+from typing import NamedTuple, Optional
+from .common import FRAME_MARKER_HEX, parse_size
+from .bg_fast import BG_INTERVAL_BYTES, BG_MARKERS
+from .header import HEADER_BACK, HEADER_KEY
+
+# file start: spectral header, then background(s), then the frames
+HEADER_OFFSET = 256
+# typical distance from the fast-mode pseudo-frame #0 marker to the first real frame
+PSEUDO_FRAME_BYTES = 40478
+# fast background blocks: marker sequence, payload BG_MARKERS[0]["delta_to_payload"] bytes later
+BG_BLOCK_BYTES = bytes.fromhex(BG_MARKERS[0]["hex"]) + bytes.fromhex("02 00 00 00")
+PSEUDO_FRAME_OFFSET = 1024
+BG_FIRST_BLOCK = 1024  # relative to the pseudo-frame marker
+# realtime background: probe grid of find_first_background_offset (512 B steps, -404 adjust)
+RT_BG_OFFSET = 16 * 512 - 404
+TRAILER_BYTES = 16
+# frames built and written per vectorized block
+GEN_BLOCK_FRAMES = 4096
+
+
+class SyntheticInfo(NamedTuple):
+    path: str
+    mode: str
+    n_frames: int
+    npts: int
+    size: int
+    first_wn: float
+    last_wn: float
+
+
+def frame_bytes(mode: str, npts: int) -> int:
+    return (80 if mode == "fast" else 84) + 4 * npts + TRAILER_BYTES
+
+
+def frames_for_size(size: int, mode: str = "fast", npts: int = 1024) -> int:
+    """Frame count that makes a synthetic file of roughly ``size`` bytes."""
+    return max(2, int(size) // frame_bytes(mode, npts))
+
+
+def _time_fields(times: np.ndarray) -> np.ndarray:
+    # 8-byte right-aligned ASCII fields as OMNIC writes them; fewer decimals for large values
+    out = np.empty(len(times), dtype="S8")
+    for i, t in enumerate(times.tolist()):
+        for digits in (4, 3, 2, 1, 0):
+            s = f"{t:8.{digits}f}"
+            if len(s) <= 8:
+                break
+        out[i] = s.encode()
+    return out
+
+
+def _band_spectrum(npts: int) -> np.ndarray:
+    # smooth single-beam-like envelope with a few absorption bands
+    x = np.linspace(0.0, 1.0, npts)
+    base = np.exp(-((x - 0.45) ** 2) / 0.08)
+    for c, w, d in ((0.2, 0.004, 0.3), (0.55, 0.002, 0.5), (0.8, 0.006, 0.2)):
+        base *= 1 - d * np.exp(-((x - c) ** 2) / w)
+    return base.astype(np.float32)
+
+
+def _preamble(mode: str, npts: int, first_wn: float, last_wn: float, n_background: int, rng) -> bytearray:
+    bg = _band_spectrum(npts) * np.float32(1.05)
+    if mode == "fast":
+        # pseudo-frame #0 carries the background blocks, spaced BG_INTERVAL_BYTES apart
+        delta = BG_MARKERS[0]["delta_to_payload"]
+        bg_pts = min(npts, (BG_INTERVAL_BYTES - delta) // 4)
+        pseudo = PSEUDO_FRAME_OFFSET
+        body = max(PSEUDO_FRAME_BYTES, BG_FIRST_BLOCK + n_background * BG_INTERVAL_BYTES)
+        out = bytearray(pseudo + body)
+        out[pseudo : pseudo + 16] = bytes.fromhex(FRAME_MARKER_HEX) + b"  0.0000"
+        for k in range(n_background):
+            blk = pseudo + BG_FIRST_BLOCK + k * BG_INTERVAL_BYTES
+            noise = rng.standard_normal(bg_pts, dtype=np.float32) * np.float32(1e-3)
+            out[blk : blk + len(BG_BLOCK_BYTES)] = BG_BLOCK_BYTES
+            out[blk + delta : blk + delta + 4 * bg_pts] = (bg[:bg_pts] + noise).astype("<f4").tobytes()
+    else:
+        # NaN filler up to the single background so the interval scan lands exactly on it
+        out = bytearray(b"\xff" * RT_BG_OFFSET) + bytearray(4 * max(npts, 1024) + 512)
+        out[RT_BG_OFFSET : RT_BG_OFFSET + 4 * npts] = bg.astype("<f4").tobytes()
+    hdr = bytearray(HEADER_BACK + len(HEADER_KEY))
+    struct.pack_into("<I", hdr, 4, npts)
+    struct.pack_into("<2f", hdr, 16, first_wn, last_wn)
+    hdr[HEADER_BACK:] = HEADER_KEY
+    out[HEADER_OFFSET : HEADER_OFFSET + len(hdr)] = hdr
+    return out
+
+
+def write_synthetic_srs(
+    path: str,
+    mode: str = "fast",
+    n_frames: int = 1000,
+    npts: int = 1024,
+    dt: float = 0.015,
+    first_wn: float = 4000.0,
+    last_wn: float = 650.0,
+    n_background: Optional[int] = None,
+    jitter: bool = False,
+    noise: float = 1e-3,
+    seed: int = 0,
+) -> SyntheticInfo:
+    """Write a synthetic ``.srs`` file with the layout the extractor expects.
+
+    Header with point count and wavenumber range, background (fast: three
+    ``BG_MARKERS``-tagged blocks inside pseudo-frame #0; realtime: one block on the
+    interval-scan grid), then ``n_frames`` frames of marker + ASCII time field +
+    payload at offset 80/84 + 16 trailing bytes, and a final marker closing the
+    last frame. ``jitter`` pads random frames by 1-2 points so frame lengths
+    vary. Frames are generated in vectorized blocks, so GB-sized files are cheap.
+    Fast background blocks hold at most 2176 points (the block spacing).
+    """
+    if mode not in ("fast", "realtime"):
+        raise ValueError(f"unknown mode {mode!r} (expected 'fast' or 'realtime')")
+    rng = np.random.default_rng(seed)
+    if n_background is None:
+        n_background = 3 if mode == "fast" else 1
+    po = 80 if mode == "fast" else 84
+    marker = np.frombuffer(bytes.fromhex(FRAME_MARKER_HEX), dtype=np.uint8)
+    spectrum = _band_spectrum(npts)
+    size = 0
+    with open(path, "wb") as f:
+        pre = _preamble(mode, npts, first_wn, last_wn, n_background, rng)
+        f.write(pre)
+        size += len(pre)
+        for b0 in range(0, n_frames, GEN_BLOCK_FRAMES):
+            k = min(GEN_BLOCK_FRAMES, n_frames - b0)
+            idx = np.arange(b0, b0 + k)
+            pad = rng.integers(0, 3, k) if jitter else np.zeros(k, dtype=np.int64)
+            width = po + 4 * (npts + (2 if jitter else 0)) + TRAILER_BYTES
+            block = np.zeros((k, width), dtype=np.uint8)
+            block[:, :8] = marker
+            block[:, 8:16] = _time_fields(idx * dt).view(np.uint8).reshape(k, 8)
+            # slow drift of the band depths plus white noise
+            scale = (1 + 0.05 * np.sin(idx / max(n_frames, 1) * 2 * np.pi)).astype(np.float32)
+            payload = spectrum[None, :] * scale[:, None]
+            if noise:
+                payload += rng.standard_normal((k, npts), dtype=np.float32) * np.float32(noise)
+            block[:, po : po + 4 * npts] = payload.astype("<f4").view(np.uint8)
+            if jitter:
+                # frames are written with their own length: drop the unused padding bytes
+                keep = np.arange(width)[None, :] < (po + 4 * (npts + pad) + TRAILER_BYTES)[:, None]
+                data = block[keep]
+            else:
+                data = block.ravel()
+            f.write(data.tobytes())
+            size += data.size
+        f.write(bytes.fromhex(FRAME_MARKER_HEX) + _time_fields(np.array([n_frames * dt]))[0] + bytes(TRAILER_BYTES))
+        size += 16 + TRAILER_BYTES
+    return SyntheticInfo(path, mode, n_frames, npts, size, first_wn, last_wn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Omnic SRS file for testing and benchmarks")
+    parser.add_argument("path", help="Output .srs path")
+    parser.add_argument("--mode", choices=["fast", "realtime"], default="fast", help="SRS format to imitate")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--frames", type=int, default=1000, help="Number of frames (default 1000)")
+    size.add_argument("--size", type=parse_size, help="Approximate file size such as 100M or 2G instead of --frames")
+    parser.add_argument("--npts", type=int, default=1024, help="Points per spectrum (default 1024)")
+    parser.add_argument("--dt", type=float, default=0.015, help="Time step between frames (default 0.015)")
+    parser.add_argument("--range", type=float, nargs=2, default=(4000.0, 650.0), metavar=("FIRST", "LAST"),
+                        help="Wavenumber range stored in the header (default 4000 650)")
+    parser.add_argument("--jitter", action="store_true", help="Pad random frames by 1-2 points")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default 0)")
+    args = parser.parse_args()
+
+    n_frames = frames_for_size(args.size, args.mode, args.npts) if args.size else args.frames
+    info = write_synthetic_srs(args.path, mode=args.mode, n_frames=n_frames, npts=args.npts, dt=args.dt,
+                               first_wn=args.range[0], last_wn=args.range[1], jitter=args.jitter, seed=args.seed)
+    print(f"📄 已生成 {info.path}: {info.mode}，{info.n_frames} 帧 × {info.npts} 点，{info.size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,101 @@
 import numpy as np
-from .common import find_all
+from .common import release_pages
+from .scanner import SCAN_CHUNK_BYTES, scan_markers
 
+# byte classes for the plain-decimal fast path; whitespace is what str.strip() removes
+_OTHER, _WS, _DIGIT, _SIGN, _DOT = range(5)
+_CLASS = np.full(256, _OTHER, dtype=np.uint8)
+_CLASS[list(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")] = _WS
+_CLASS[list(b"0123456789")] = _DIGIT
+_CLASS[list(b"+-")] = _SIGN
+_CLASS[ord(".")] = _DOT
+# fields parsed per vectorized block; bounds the (n, 8) temporaries
+PARSE_BATCH = 1 << 20
 
-def extract_time_axis(srs: bytes, frame_marker: bytes, mode: str = "fast"):
-    positions = find_all(srs, frame_marker)
-    if len(positions) < 2:
-        print("未找到足够帧标志，无法提取时间轴")
-        return None, positions
 
-    time_vals = []
-    for pos in positions:
-        ascii_part = srs[pos + 8: pos + 16]
-        val_str = ascii_part.decode(errors="ignore").strip()
+def parse_time_fields(srs: bytes, positions, release: bool = False) -> np.ndarray:
+    """Parse the 8-byte ASCII time/potential field after each frame marker.
+
+    All fields are gathered with one fancy-indexed read and the plain decimal
+    ones (``[+-]digits[.digits]`` padded with whitespace) are converted in bulk
+    through an ``S8`` array. Anything else (exponents, non-ASCII bytes, ...) goes
+    through the original ``decode``/``strip``/``float`` path; failures become NaN.
+    With ``release`` the mmap pages touched by each block are dropped afterwards.
+    """
+    pos = np.asarray(positions, dtype=np.int64)
+    step = PARSE_BATCH
+    if release and len(pos) > 1:
+        # every field sits on its own page; keep the pages touched per block bounded
+        gap = max(1, int(pos[-1] - pos[0]) // (len(pos) - 1))
+        step = max(1, min(step, SCAN_CHUNK_BYTES // gap))
+    if len(pos) > step or release:
+        parts = []
+        for i in range(0, len(pos), step):
+            blk = pos[i : i + step]
+            parts.append(parse_time_fields(srs, blk))
+            if release:
+                release_pages(srs, int(blk[0]), int(blk[-1]) + 16)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=float)
+    data = np.frombuffer(srs, dtype=np.uint8)
+    if len(pos) == 0:
+        return np.empty(0, dtype=float)
+    idx = pos[:, None] + np.arange(8, 16)
+    # fields cut off by EOF are shorter in the original slice; pad with stripped spaces
+    chars = np.where(idx < len(data), data[np.minimum(idx, len(data) - 1)], ord(" ")).astype(np.uint8)
+
+    cls = _CLASS[chars]
+    plain = (cls != _OTHER).all(axis=1)
+    content = cls != _WS
+    first = content.argmax(axis=1)
+    last = 7 - content[:, ::-1].argmax(axis=1)
+    n_sign = (cls == _SIGN).sum(axis=1)
+    valid = (
+        plain
+        & content.any(axis=1)
+        & (content.sum(axis=1) == last - first + 1)
+        & (cls == _DIGIT).any(axis=1)
+        & ((cls == _DOT).sum(axis=1) <= 1)
+        & ((n_sign == 0) | ((n_sign == 1) & (cls[np.arange(len(pos)), first] == _SIGN)))
+    )
+
+    time_vals = np.full(len(pos), np.nan)
+    if valid.any():
+        fields = np.where(cls[valid] == _WS, ord(" "), chars[valid]).astype(np.uint8)
+        time_vals[valid] = np.ascontiguousarray(fields).view("S8").ravel().astype(float)
+    for i in np.flatnonzero(~plain):
+        p = int(pos[i])
+        val_str = srs[p + 8 : p + 16].decode(errors="ignore").strip()
         try:
-            val = float(val_str)
+            time_vals[i] = float(val_str)
         except ValueError:
-            val = np.nan
-        time_vals.append(val)
+            pass
+    return time_vals
+
+
+def extract_time_axis(
+    srs: bytes, frame_marker: bytes, mode: str = "fast", positions=None, release: bool = False, verbose: bool = True
+):
+    # positions may come from a shared scan_markers pass; otherwise scan here
+    if positions is None:
+        positions = scan_markers(srs, [frame_marker], max_hits=200000)[frame_marker]
+    if len(positions) < 2:
+        if verbose:
+            print("未找到足够帧标志，无法提取时间轴")
+        return None, positions
 
-    time_vals = np.asarray(time_vals, dtype=float)
+    time_vals = parse_time_fields(srs, positions, release=release)
     finite = np.isfinite(time_vals)
     if not finite.any():
-        print("未解析出有效时间值")
+        if verbose:
+            print("未解析出有效时间值")
         return None, positions
 
     # ✅ 新增：自动检测伪帧 #0
     if mode == "fast" and len(positions) > 1:
         first_gap = positions[1] - positions[0]
         if first_gap > 20000:  # 典型伪帧差距 40478 B
-            print(f"⚙ 检测到首帧异常（伪帧 #0），间距 = {first_gap} bytes，自动跳过。")
+            if verbose:
+                print(f"⚙ 检测到首帧异常（伪帧 #0），间距 = {first_gap} bytes，自动跳过。")
             positions = positions[1:]
             time_vals = time_vals[1:] if len(time_vals) > len(positions) else time_vals
             # 🔧 同步修复布尔掩码长度
@@ -36,5 +103,6 @@ def extract_time_axis(srs: bytes, frame_marker: bytes, mode: str = "fast"):
 
     # ✅ 输出信息时使用最新掩码
     valid_vals = time_vals[finite]
-    print(f"✅ 解析时间/电位 {len(valid_vals)} 点，范围: {valid_vals[0]:.4f} ~ {valid_vals[-1]:.4f}")
+    if verbose:
+        print(f"✅ 解析时间/电位 {len(valid_vals)} 点，范围: {valid_vals[0]:.4f} ~ {valid_vals[-1]:.4f}")
     return time_vals, positions
@@ -0,0 +1,171 @@
+import json
+import numpy as np
+from typing import Dict, Iterable, Iterator, Optional
+from .common import QUALITY_STD_MIN
+
+# frame indices listed per problem in the report; the counts are always complete
+REPORT_MAX_INDICES = 20
+# distinct frame lengths listed in the report, most frequent first
+REPORT_MAX_LENGTHS = 10
+# frames with fewer points than this fraction of the most common length count as
+# short (cut off); lengths varying by a point or two between frames are normal
+SHORT_FRAME_RATIO = 0.99
+
+
+class FrameQuality:
+    """Per-frame content checks accumulated over decoded ``(frames, npts)`` batches.
+
+    A frame is bad when it holds NaN/Inf or is flat (std <= ``QUALITY_STD_MIN``).
+    Each batch costs one min and one max reduction in float32: a non-finite value
+    propagates into them, and the range bounds the std (range / sqrt(2 * npts)
+    <= std <= range / 2), so only frames whose range leaves the outcome open get
+    an exact ``np.std``, and only frames with non-finite values get counted.
+    """
+
+    def __init__(self, n_frames: int):
+        self.n_frames = n_frames
+        self.nan = np.zeros(n_frames, dtype=np.int64)
+        self.inf = np.zeros(n_frames, dtype=np.int64)
+        self.flat = np.zeros(n_frames, dtype=bool)
+        self.seen = 0
+
+    def update(self, block: np.ndarray):
+        rows = slice(self.seen, self.seen + len(block))
+        self.seen += len(block)
+        if block.size == 0:
+            return
+        with np.errstate(invalid="ignore"):
+            lo = block.min(axis=1).astype(np.float64)
+            hi = block.max(axis=1).astype(np.float64)
+            span = hi - lo
+        finite = np.isfinite(span)
+        for i in np.flatnonzero(~finite):
+            self.nan[rows.start + i] = np.count_nonzero(np.isnan(block[i]))
+            self.inf[rows.start + i] = np.count_nonzero(np.isinf(block[i]))
+        flat = finite & (span <= 2 * QUALITY_STD_MIN)
+        maybe = np.flatnonzero(finite & ~flat & (span <= np.sqrt(2 * block.shape[1]) * QUALITY_STD_MIN))
+        if len(maybe):
+            flat[maybe] = np.std(block[maybe], axis=1, dtype=np.float64) <= QUALITY_STD_MIN
+        self.flat[rows] = flat
+
+    def tap(self, batches: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Yield ``batches`` unchanged, checking each one on the way."""
+        for block in batches:
+            self.update(block)
+            yield block
+
+    @property
+    def nonfinite(self) -> np.ndarray:
+        return (self.nan > 0) | (self.inf > 0)
+
+    @property
+    def bad(self) -> np.ndarray:
+        """Mask of frames to drop."""
+        return self.nonfinite | self.flat
+
+
+def _indices(mask: np.ndarray, frame_ids: Optional[np.ndarray]) -> list:
+    idx = np.flatnonzero(mask)[:REPORT_MAX_INDICES]
+    return (frame_ids[idx] if frame_ids is not None else idx).tolist()
+
+
+def length_report(points: np.ndarray, npts: int, frame_ids: Optional[np.ndarray] = None) -> Dict:
+    """Histogram of frame payload lengths (points) and what the common width cuts off.
+
+    ``points`` holds the payload length of every frame (from the gaps between frame
+    markers); all frames are exported with the shortest length ``npts``.
+    Frames shorter than ``SHORT_FRAME_RATIO`` of the most common length are listed
+    as short.
+    """
+    values, counts = np.unique(points, return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:REPORT_MAX_LENGTHS]
+    modal = int(values[order[0]]) if len(values) else 0
+    longer = points > npts
+    short = points < modal * SHORT_FRAME_RATIO
+    return {
+        "npts": int(npts),
+        "modal_npts": modal,
+        "distinct_lengths": int(len(values)),
+        "histogram": {str(int(values[i])): int(counts[i]) for i in order},
+        "truncated_frames": int(np.count_nonzero(longer)),
+        "truncated_points_max": int((points - npts).max()) if len(points) else 0,
+        "short_min_npts": int(np.ceil(modal * SHORT_FRAME_RATIO)),
+        "short_frames": int(np.count_nonzero(short)),
+        "short_frame_indices": _indices(short, frame_ids),
+    }
+
+
+def time_report(time_col: Optional[np.ndarray], frame_ids: Optional[np.ndarray] = None) -> Dict:
+    """NaN and non-increasing steps of the time axis."""
+    if time_col is None:
+        return {"available": False}
+    t = np.asarray(time_col, dtype=np.float64)
+    nan = np.isnan(t)
+    valid = np.flatnonzero(~nan)
+    d = np.diff(t[valid])
+    back = np.zeros(len(t), dtype=bool)
+    back[valid[1:][d < 0]] = True
+    repeat = np.zeros(len(t), dtype=bool)
+    repeat[valid[1:][d == 0]] = True
+    return {
+        "available": True,
+        "nan": int(np.count_nonzero(nan)),
+        "nan_indices": _indices(nan, frame_ids),
+        "backward_steps": int(np.count_nonzero(back)),
+        "backward_indices": _indices(back, frame_ids),
+        "repeated": int(np.count_nonzero(repeat)),
+        "repeated_indices": _indices(repeat, frame_ids),
+        "monotonic": not back.any() and not repeat.any(),
+    }
+
+
+def content_report(quality: FrameQuality, frame_ids: Optional[np.ndarray] = None) -> Dict:
+    nonfinite = quality.nonfinite
+    return {
+        "frames": int(quality.seen),
+        "nonfinite_frames": int(np.count_nonzero(nonfinite)),
+        "nonfinite_indices": _indices(nonfinite, frame_ids),
+        "nan_values": int(quality.nan.sum()),
+        "inf_values": int(quality.inf.sum()),
+        "flat_frames": int(np.count_nonzero(quality.flat)),
+        "flat_indices": _indices(quality.flat, frame_ids),
+        "std_min": QUALITY_STD_MIN,
+        "bad_frames": int(np.count_nonzero(quality.bad)),
+    }
+
+
+def write_validation(path: str, report: Dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_validation(report: Dict):
+    lengths = report.get("lengths")
+    if lengths:
+        hist = "，".join(f"{k} 点 × {v}" for k, v in lengths["histogram"].items())
+        print(f"🔎 帧长度: {lengths['distinct_lengths']} 种（{hist}）")
+        if lengths["truncated_frames"]:
+            print(f"  ⚠ {lengths['truncated_frames']} 帧长于 {lengths['npts']} 点，"
+                  f"导出时截去最多 {lengths['truncated_points_max']} 点")
+        if lengths["short_frames"]:
+            print(f"  ⚠ {lengths['short_frames']} 帧短于 {lengths['short_min_npts']} 点（常见长度 {lengths['modal_npts']} 点）: "
+                  f"{lengths['short_frame_indices']}")
+    times = report.get("time")
+    if times and times["available"]:
+        if times["monotonic"] and not times["nan"]:
+            print("🔎 时间轴: 严格递增")
+        else:
+            print(f"🔎 时间轴: NaN {times['nan']} 个 {times['nan_indices']}，回退 {times['backward_steps']} 处 {times['backward_indices']}，"
+                  f"重复 {times['repeated']} 处 {times['repeated_indices']}")
+    content = report.get("content")
+    if content:
+        print(f"🔎 光谱: {content['frames']} 帧中含 NaN/Inf {content['nonfinite_frames']} 帧"
+              f"（NaN {content['nan_values']} 个，Inf {content['inf_values']} 个），"
+              f"平坦 {content['flat_frames']} 帧（std ≤ {content['std_min']:g}）")
+        if content["nonfinite_frames"]:
+            print(f"  NaN/Inf 帧: {content['nonfinite_indices']}")
+        if content["flat_frames"]:
+            print(f"  平坦帧: {content['flat_indices']}")
+    dropped = report.get("dropped_frames")
+    if dropped:
+        print(f"  已剔除 {dropped} 帧")
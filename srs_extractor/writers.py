@@ -0,0 +1,259 @@
+import os
+import zipfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# rows formatted per chunk; bounds the temporary arrays/strings per chunk
+CHUNK_ROWS = 256
+
+# 2**q * 10**p is held as a fixed-point integer with this many fractional bits,
+# split into 32-bit limbs; enough to make every float32 product exact
+_FRAC_BITS = 128
+_NLIMBS = 6
+_Q_MIN, _Q_MAX = -149, 104
+_P_MAX = 66
+_SCALE_TABLE = None
+
+
+def _scale_table():
+    global _SCALE_TABLE
+    if _SCALE_TABLE is None:
+        tab = np.zeros((_Q_MAX - _Q_MIN + 1, _P_MAX, _NLIMBS), dtype=np.uint64)
+        ok = np.zeros(tab.shape[:2], dtype=bool)
+        # limb-major so each limb is one contiguous np.take source
+        for qi, q in enumerate(range(_Q_MIN, _Q_MAX + 1)):
+            for p in range(_P_MAX):
+                shift = q + p + _FRAC_BITS
+                if shift < 0:
+                    continue
+                k = 5 ** p << shift
+                if k.bit_length() > 32 * _NLIMBS:
+                    continue
+                tab[qi, p] = [(k >> (32 * i)) & 0xFFFFFFFF for i in range(_NLIMBS)]
+                ok[qi, p] = True
+        _SCALE_TABLE = (np.ascontiguousarray(tab.reshape(-1, _NLIMBS).T), ok)
+    return _SCALE_TABLE
+
+
+def _scaled_digits(m: np.ndarray, qi: np.ndarray, p: np.ndarray):
+    """m * 2**q * 10**p as (integer part, overflowed, fraction > 1/2, fraction == 1/2)."""
+    tab, _ = _scale_table()
+    idx = qi * _P_MAX + p
+    limbs, carry = [], np.zeros(len(m), dtype=np.uint64)
+    for i in range(_NLIMBS):
+        t = m * tab[i].take(idx) + carry
+        limbs.append(t & np.uint64(0xFFFFFFFF))
+        carry = t >> np.uint64(32)
+    overflow = carry != 0
+    ipart = limbs[4] | (limbs[5] << np.uint64(32))
+    hi, low = limbs[3], limbs[2] | limbs[1] | limbs[0]
+    half = np.uint64(1 << 31)
+    above = (hi > half) | ((hi == half) & (low != 0))
+    exact_half = (hi == half) & (low == 0)
+    return ipart, overflow, above, exact_half
+
+
+def _format_float32(values: np.ndarray, precision: int, delimiter: bytes, ncols: int):
+    """Vectorized ``"%.{precision}e"`` of float32 values, identical to Python's output.
+
+    Each value is m * 2**q exactly; scaling by 10**p through a precomputed
+    fixed-point table gives the leading digits and an exact remainder, so
+    rounding (half to even) matches Python's correctly rounded conversion.
+    Returns the concatenated row bytes and the byte length of every row, or
+    None when a value needs the generic path (inf/nan, too large, ...).
+    """
+    _, ok = _scale_table()
+    bits = values.view(np.uint32).astype(np.uint64)
+    neg = (bits >> np.uint64(31)).astype(bool)
+    exp = ((bits >> np.uint64(23)) & np.uint64(0xFF)).astype(np.int64)
+    frac = bits & np.uint64(0x7FFFFF)
+    if (exp == 255).any():
+        return None
+    m = np.where(exp == 0, frac, frac | np.uint64(0x800000))
+    zero = m == 0
+    # zeros only need some valid table entry; their digits come out as 0
+    qi = np.where(zero, 0, np.where(exp == 0, 1, exp) - 150) - _Q_MIN
+
+    lo, hi = np.uint64(10 ** precision), np.uint64(10 ** (precision + 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        e10 = np.floor(np.log10(np.abs(values.astype(np.float64)))).astype(np.int64)
+    e10[zero] = 0
+    for _ in range(3):
+        p = precision - e10
+        if ((p < 0) | (p >= _P_MAX)).any() or not ok[qi, p].all():
+            return None
+        ipart, overflow, above, exact_half = _scaled_digits(m, qi, p)
+        too_big = ~zero & (overflow | (ipart >= hi))
+        too_small = ~zero & ~too_big & (ipart < lo)
+        if not (too_big.any() or too_small.any()):
+            break
+        e10 += too_big.astype(np.int64) - too_small.astype(np.int64)
+    else:
+        return None
+
+    digits = ipart + (above | (exact_half & ((ipart & np.uint64(1)) == 1))).astype(np.uint64)
+    carried = digits == hi
+    digits[carried] = lo
+    e10[carried] += 1
+
+    # field: [sign] d [.] d*precision e +/- dd delimiter
+    dot = 1 if precision > 0 else 0
+    width = 1 + 1 + dot + precision + 4 + 1
+    out = np.empty((len(values), width), dtype=np.uint8)
+    out[:, 0] = ord("-")
+    ten = np.uint64(10)
+    dig = np.empty((precision + 1, len(values)), dtype=np.uint8)
+    for j in range(precision, -1, -1):
+        rest = digits // ten
+        dig[j] = digits - rest * ten
+        digits = rest
+    dig += ord("0")
+    out[:, 1] = dig[0]
+    if dot:
+        out[:, 2] = ord(".")
+        out[:, 3 : 3 + precision] = dig[1:].T
+    base = width - 5
+    out[:, base] = ord("e")
+    out[:, base + 1] = np.where(e10 < 0, ord("-"), ord("+"))
+    ae = np.abs(e10)
+    out[:, base + 2] = ae // 10 + ord("0")
+    out[:, base + 3] = ae % 10 + ord("0")
+    out[:, base + 4] = delimiter[0]
+    out[ncols - 1 :: ncols, base + 4] = ord("\n")
+    keep = np.ones(out.shape, dtype=bool)
+    keep[:, 0] = neg
+    row_len = (width - 1) * ncols + neg.reshape(-1, ncols).sum(axis=1)
+    return out[keep].tobytes(), row_len
+
+
+def _format_chunk(precision: int, delimiter: str, block: np.ndarray, first_col: Optional[np.ndarray]) -> str:
+    fmt = f"%.{precision}e"
+    body = None
+    if block.dtype == np.float32 and precision <= 18 and len(delimiter.encode()) == 1 and block.size:
+        body = _format_float32(np.ascontiguousarray(block).ravel(), precision, delimiter.encode(), block.shape[1])
+    if body is None:
+        if first_col is not None:
+            block = np.column_stack((first_col, block))
+        row_fmt = delimiter.join([fmt] * block.shape[1]) + "\n"
+        return (row_fmt * block.shape[0]) % tuple(block.ravel().tolist())
+    text, row_len = body[0].decode("ascii"), body[1]
+    if first_col is None:
+        return text
+    ends = np.cumsum(row_len).tolist()
+    starts = [0] + ends[:-1]
+    prefix = fmt + delimiter
+    return "".join(prefix % t + text[a:b] for t, a, b in zip(first_col.tolist(), starts, ends))
+
+
+class RowStream(NamedTuple):
+    """A float32 matrix of known ``shape`` delivered as consecutive row blocks."""
+
+    shape: Tuple[int, int]
+    batches: Iterable[np.ndarray]
+
+
+def write_text_batches(
+    path: str,
+    batches: Iterable[np.ndarray],
+    header: str,
+    first_col: Optional[np.ndarray] = None,
+    precision: int = 18,
+    delimiter: str = "\t",
+    chunk_rows: int = CHUNK_ROWS,
+    workers: int = 0,
+):
+    """Write consecutive row blocks as delimited text, byte-identical to ``np.savetxt``
+    with ``comments=""``.
+
+    Each block is split into ``chunk_rows`` chunks and float32 chunks are
+    formatted with vectorized integer arithmetic instead of per-value ``%``
+    formatting. ``first_col`` (e.g. the time axis) is written as the leading
+    column of each row rather than stacked in up front. With ``workers > 0``
+    chunks are formatted on a thread pool (the NumPy work releases the GIL)
+    while earlier chunks are written; at most ``2 * workers + 1`` are in flight.
+    """
+    if first_col is not None:
+        first_col = np.asarray(first_col, dtype=np.float64)
+
+    def chunks():
+        row = 0
+        for block in batches:
+            block = np.asarray(block)
+            if block.ndim == 1:
+                block = block[:, np.newaxis]
+            for i in range(0, block.shape[0], chunk_rows):
+                part = block[i : i + chunk_rows]
+                col = first_col[row : row + len(part)] if first_col is not None else None
+                row += len(part)
+                yield part, col
+
+    # text mode keeps the platform newline translation np.savetxt gets
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(header + "\n")
+        if workers <= 0:
+            for part, col in chunks():
+                fh.write(_format_chunk(precision, delimiter, part, col))
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for part, col in chunks():
+                pending.append(pool.submit(_format_chunk, precision, delimiter, part, col))
+                if len(pending) > 2 * workers:
+                    fh.write(pending.pop(0).result())
+            for fut in pending:
+                fh.write(fut.result())
+
+
+def append_text_rows(fh, block: np.ndarray, first_col: Optional[np.ndarray] = None, precision: int = 18,
+                     delimiter: str = "\t", chunk_rows: int = CHUNK_ROWS):
+    """Format ``block`` as ``write_text_batches`` does and append it to an open text file."""
+    if first_col is not None:
+        first_col = np.asarray(first_col, dtype=np.float64)
+    for i in range(0, block.shape[0], chunk_rows):
+        col = first_col[i : i + chunk_rows] if first_col is not None else None
+        fh.write(_format_chunk(precision, delimiter, block[i : i + chunk_rows], col))
+
+
+def write_text_matrix(path: str, matrix: np.ndarray, header: str, first_col: Optional[np.ndarray] = None, **kwargs):
+    """``write_text_batches`` for a single in-memory (or memory-mapped) matrix."""
+    write_text_batches(path, [matrix], header, first_col=first_col, **kwargs)
+
+
+def _write_npy(fh, arr):
+    if not isinstance(arr, RowStream):
+        np.lib.format.write_array(fh, np.asarray(arr, dtype=np.float32), allow_pickle=False)
+        return
+    # same layout np.save produces, filled batch by batch
+    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False, "shape": tuple(arr.shape)}
+    np.lib.format.write_array_header_1_0(fh, header)
+    for block in arr.batches:
+        fh.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+
+
+def write_npy_arrays(outdir: str, base_name: str, arrays: Dict[str, Union[None, np.ndarray, RowStream]]) -> List[str]:
+    """Save each array as float32 ``{base_name}_{name}.npy``; None entries are skipped.
+
+    ``.npy`` keeps the data in one contiguous block after a small header, so
+    ``np.load(path, mmap_mode="r")`` opens even the spectra instantly.
+    ``RowStream`` values are written batch by batch without holding the matrix.
+    """
+    paths = []
+    for name, arr in arrays.items():
+        if arr is None:
+            continue
+        path = os.path.join(outdir, f"{base_name}_{name}.npy")
+        with open(path, "wb") as fh:
+            _write_npy(fh, arr)
+        paths.append(path)
+    return paths
+
+
+def write_npz_arrays(path: str, arrays: Dict[str, Union[None, np.ndarray, RowStream]]):
+    """Save all non-None arrays as float32 members of one uncompressed ``.npz``."""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name, arr in arrays.items():
+            if arr is None:
+                continue
+            with zf.open(f"{name}.npy", "w", force_zip64=True) as fh:
+                _write_npy(fh, arr)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from srs_extractor.common import FRAME_MARKER_HEX
+from srs_extractor.synthetic import write_synthetic_srs
+
+N_FRAMES = 300
+NPTS = 256
+DT = 0.015
+
+
+@pytest.fixture(scope="session")
+def srs_files(tmp_path_factory):
+    """Small synthetic files: fast, realtime and fast with varying frame lengths."""
+    root = tmp_path_factory.mktemp("srs")
+    files = {}
+    for name, mode, jitter in (("fast", "fast", False), ("realtime", "realtime", False), ("jitter", "fast", True)):
+        path = str(root / f"{name}.srs")
+        write_synthetic_srs(path, mode=mode, n_frames=N_FRAMES, npts=NPTS, dt=DT, jitter=jitter, seed=1)
+        files[name] = (path, mode)
+    return files
+
+
+def naive_extract(path, mode):
+    """(time, wavenumber, spectra) decoded frame by frame with plain Python, as the baseline."""
+    with open(path, "rb") as f:
+        srs = f.read()
+    marker = bytes.fromhex(FRAME_MARKER_HEX)
+    pos, p = [], srs.find(marker)
+    while p != -1:
+        pos.append(p)
+        p = srs.find(marker, p + 1)
+    if mode == "fast" and len(pos) > 1 and pos[1] - pos[0] > 20000:
+        pos = pos[1:]  # pseudo-frame #0 holding the backgrounds
+    po = 80 if mode == "fast" else 84
+    npts = min((b - 16 - (a + po)) // 4 for a, b in zip(pos, pos[1:]))
+    spectra = np.array([np.frombuffer(srs, dtype="<f4", count=npts, offset=a + po) for a in pos[:-1]])
+    time = np.array([float(srs[a + 8 : a + 16]) for a in pos[:-1]])
+    wn = np.linspace(4000.0, 650.0, npts)
+    return time, wn, spectra
+
+
+def savetxt_reference(path, time, wn, spectra):
+    """The time-series text file exactly as np.savetxt writes it."""
+    header = ("\t" if time is not None else "") + "\t".join(f"{x:.6f}" for x in wn)
+    data = spectra if time is None else np.column_stack([time, spectra.astype(np.float64)])
+    np.savetxt(path, data, fmt="%.18e", delimiter="\t", header=header, comments="")
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from srs_extractor.archive import SrsArchive, write_archive
+from srs_extractor.extract_core import run_extraction
+from srs_extractor.writers import RowStream
+from .conftest import naive_extract
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("chunk_frames,workers,filters", [
+    (64, 0, ("delta", "shuffle")),
+    (7, 2, ("shuffle",)),
+    (1000, 1, ()),
+    (1, 0, ("delta",)),
+])
+def test_round_trip(tmp_path, chunk_frames, workers, filters):
+    rng = np.random.default_rng(0)
+    m = (1 + 1e-3 * rng.standard_normal((500, 33))).astype(np.float32)
+    m[5, 7], m[9, 3], m[10] = np.nan, -np.inf, 0
+    t = np.arange(500) * 0.1
+    path = str(tmp_path / "a.srsa")
+    write_archive(path, RowStream(m.shape, (m[i : i + 37] for i in range(0, 500, 37))), {"time": t, "bg": None},
+                  chunk_frames=chunk_frames, workers=workers, filters=filters)
+    with SrsArchive(path) as a:
+        assert a.shape == m.shape and a.bg is None
+        np.testing.assert_array_equal(a.time, t)
+        np.testing.assert_array_equal(np.asarray(a), m)
+        rows = rng.integers(-500, 500, 40)
+        np.testing.assert_array_equal(a[rows], m[rows])
+        np.testing.assert_array_equal(a[::-3], m[::-3])
+        np.testing.assert_array_equal(a[490:900], m[490:])
+        np.testing.assert_array_equal(a[m[:, 0] > 1], m[m[:, 0] > 1])
+        np.testing.assert_array_equal(a[-3, ::2], m[-3, ::2])
+        np.testing.assert_array_equal(a[100:120, 5], m[100:120, 5])
+        assert a[300:200].shape == (0, 33)
+        np.testing.assert_array_equal(np.concatenate(list(a.iter_batches(13, 271))), m[13:271])
+        with pytest.raises(IndexError):
+            a[0, 1, 2]
+
+
+def test_empty_archive(tmp_path):
+    wn = np.linspace(1000, 2000, 17)
+    path = str(tmp_path / "empty.srsa")
+    index = write_archive(path, RowStream((0, 17), iter([])), {"time": np.empty(0), "wavenumber": wn})
+    assert index["shape"] == [0, 17]
+    with SrsArchive(path) as a:
+        assert a.shape == (0, 17) and len(a) == 0 and a.n_chunks == 0
+        assert np.asarray(a).shape == (0, 17)
+        assert a[:].shape == (0, 17) and a[np.arange(0)].shape == (0, 17)
+        assert list(a.iter_batches()) == []
+        with pytest.raises(IndexError):
+            a[0]
+    subprocess.run([sys.executable, "-m", "srs_extractor.archive", "unpack", path, "-o", str(tmp_path / "un")],
+                   check=True, capture_output=True, cwd=ROOT)
+    assert (tmp_path / "un" / "empty.txt").read_text().rstrip("\n") == "\t" + "\t".join(f"{x:.6f}" for x in wn)
+    subprocess.run([sys.executable, "-m", "srs_extractor.archive", "pack", str(tmp_path / "un" / "empty.txt")],
+                   check=True, capture_output=True, cwd=ROOT)
+    with SrsArchive(str(tmp_path / "un" / "empty.srsa")) as a:
+        assert a.shape == (0, 17)
+        np.testing.assert_array_equal(a.wavenumber, wn.round(6))
+
+
+def test_extraction_archive_and_unpacked_txt(srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    time, wn, spectra = naive_extract(path, mode)
+    run_extraction(path, mode=mode, outdir=str(tmp_path / "txt"), use_cache=False)
+    run_extraction(path, mode=mode, outdir=str(tmp_path / "arc"), out_format="archive", max_memory=64 << 10,
+                   use_cache=False)
+    with SrsArchive(str(tmp_path / "arc" / "fast.srsa")) as a:
+        np.testing.assert_array_equal(np.asarray(a), spectra)
+        np.testing.assert_array_equal(a.time, time)
+        np.testing.assert_array_equal(a.wavenumber, wn)
+        assert a.bg.shape == (3, spectra.shape[1])
+    subprocess.run([sys.executable, "-m", "srs_extractor.archive", "unpack", str(tmp_path / "arc" / "fast.srsa"),
+                    "-o", str(tmp_path / "un")], check=True, capture_output=True, cwd=ROOT)
+    assert (tmp_path / "un" / "fast.txt").read_bytes() == (tmp_path / "txt" / "fast.txt").read_bytes()
+
+
+def test_pack_text_output(srs_files, tmp_path):
+    path, mode = srs_files["realtime"]
+    run_extraction(path, mode=mode, outdir=str(tmp_path), use_cache=False)
+    subprocess.run([sys.executable, "-m", "srs_extractor.archive", "pack", str(tmp_path / "realtime.txt"),
+                    "-o", str(tmp_path / "arc")], check=True, capture_output=True, cwd=ROOT)
+    _, _, spectra = naive_extract(path, mode)
+    with SrsArchive(str(tmp_path / "arc" / "realtime.srsa")) as a:
+        np.testing.assert_array_equal(np.asarray(a), spectra)
+        assert a.bg.shape == (1, spectra.shape[1])
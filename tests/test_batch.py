@@ -0,0 +1,36 @@
+import os
+import shutil
+import pytest
+from srs_extractor.batch import collect_srs_files, run_batch
+
+
+@pytest.fixture
+def campaign(srs_files, tmp_path):
+    root = tmp_path / "in"
+    (root / "sub").mkdir(parents=True)
+    shutil.copy(srs_files["fast"][0], root / "a.srs")
+    shutil.copy(srs_files["fast"][0], root / "sub" / "A.SRS")  # same output base name as a.srs
+    (root / "broken.srs").write_bytes(b"\0" * 4096)
+    (root / "notes.txt").write_text("not an srs file")
+    return root
+
+
+def test_collect_srs_files(campaign):
+    found = collect_srs_files([str(campaign)])
+    assert [os.path.relpath(p, campaign) for p in found] == ["a.srs", "broken.srs"]
+    found = collect_srs_files([str(campaign), str(campaign / "a.srs"), str(campaign / "*.srs")], recursive=True)
+    assert [os.path.relpath(p, campaign) for p in found] == ["a.srs", "broken.srs", os.path.join("sub", "A.SRS")]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_and_duplicate_files_do_not_stop_the_batch(campaign, tmp_path, workers):
+    files = collect_srs_files([str(campaign)], recursive=True)
+    out = tmp_path / "out"
+    results = run_batch(files, workers=workers, mode="fast", outdir=str(out), use_cache=False)
+    by_name = {os.path.relpath(r.path, campaign): r for r in results}
+    assert [r.path for r in results] == files
+    assert by_name["a.srs"].error is None
+    assert sorted(os.path.basename(p) for p in by_name["a.srs"].written) == ["a.txt", "a_bg.txt"]
+    assert by_name["broken.srs"].error is not None and by_name["broken.srs"].written == []
+    assert "重复" in by_name[os.path.join("sub", "A.SRS")].error
+    assert sorted(os.listdir(out)) == ["a.txt", "a_bg.txt"]
@@ -0,0 +1,27 @@
+import argparse
+import inspect
+import sys
+import pytest
+from srs_extractor import batch, cli
+
+
+@pytest.mark.parametrize("main", [cli.main, batch.main])
+def test_negative_precision_rejected(main, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["prog", "missing.srs", "--mode", "fast", "--precision", "-1"])
+    with pytest.raises(SystemExit):
+        main()
+    assert "--precision: must be >= 0" in capsys.readouterr().err
+
+
+def test_extraction_kwargs_match_run_extraction():
+    from srs_extractor.extract_core import run_extraction
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", default="auto")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--cprofile", action="store_true")
+    cli.add_extraction_arguments(parser)
+    kwargs = cli.extraction_kwargs(parser.parse_args(["--crop", "1000", "2000", "--time-bin", "0.5", "--bg-ref", "2"]))
+    assert set(kwargs) <= set(inspect.signature(run_extraction).parameters)
+    assert kwargs["crop"] == (1000.0, 2000.0) and kwargs["time_bin"] == 0.5 and kwargs["bg_ref"] == 1
+    assert kwargs["use_cache"] and kwargs["precision"] == 18
@@ -0,0 +1,161 @@
+import argparse
+import os
+import numpy as np
+import pytest
+from srs_extractor import extract_core, index_cache
+from srs_extractor.extract_core import run_extraction
+from srs_extractor.index_cache import load_frame_index
+from srs_extractor.common import map_srs
+from .conftest import NPTS, naive_extract, savetxt_reference
+
+
+def _run(path, mode, outdir, **kwargs):
+    kwargs.setdefault("use_cache", False)
+    written = run_extraction(path, mode=mode, outdir=str(outdir), **kwargs)
+    assert written is not None
+    return written
+
+
+def _spectra(outdir, name):
+    return np.load(os.path.join(str(outdir), f"{name}_spectra.npy"))
+
+
+@pytest.mark.parametrize("name", ["fast", "realtime", "jitter"])
+def test_txt_matches_savetxt_baseline(srs_files, tmp_path, name):
+    path, mode = srs_files[name]
+    _run(path, mode, tmp_path / "out")
+    savetxt_reference(tmp_path / "ref.txt", *naive_extract(path, mode))
+    assert (tmp_path / "out" / f"{name}.txt").read_bytes() == (tmp_path / "ref.txt").read_bytes()
+
+
+@pytest.mark.parametrize("options", [
+    dict(max_memory=64 << 10),
+    dict(max_memory=64 << 10, write_workers=2),
+    dict(pipeline=True),
+    dict(pipeline=True, max_memory=64 << 10),
+    dict(mode="auto"),
+])
+def test_batched_paths_match_whole_matrix(srs_files, tmp_path, options):
+    path, mode = srs_files["realtime"]
+    mode = options.pop("mode", mode)
+    _run(path, "realtime", tmp_path / "whole")
+    _run(path, mode, tmp_path / "batched", **options)
+    for name in ("realtime.txt", "realtime_bg.txt"):
+        assert (tmp_path / "whole" / name).read_bytes() == (tmp_path / "batched" / name).read_bytes()
+
+
+@pytest.mark.parametrize("max_memory", [None, 64 << 10])
+def test_npy_and_npz_match_baseline(srs_files, tmp_path, max_memory):
+    path, mode = srs_files["fast"]
+    time, wn, spectra = naive_extract(path, mode)
+    _run(path, mode, tmp_path, out_format="npy", max_memory=max_memory)
+    _run(path, mode, tmp_path, out_format="npz", max_memory=max_memory)
+    np.testing.assert_array_equal(_spectra(tmp_path, "fast"), spectra)
+    np.testing.assert_array_equal(np.load(tmp_path / "fast_time.npy"), time.astype(np.float32))
+    with np.load(tmp_path / "fast.npz") as z:
+        np.testing.assert_array_equal(z["spectra"], spectra)
+        np.testing.assert_array_equal(z["bg"], np.load(tmp_path / "fast_bg.npy"))
+
+
+def test_cached_index_gives_same_output(srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    cache = str(tmp_path / "cache")
+    _run(path, mode, tmp_path / "first", use_cache=True, cache_dir=cache)
+    assert load_frame_index(path, map_srs(path), mode, cache) is not None
+    _run(path, mode, tmp_path / "second", use_cache=True, cache_dir=cache)
+    for name in ("fast.txt", "fast_bg.txt"):
+        assert (tmp_path / "first" / name).read_bytes() == (tmp_path / "second" / name).read_bytes()
+
+
+def test_failed_cache_write_leaves_no_temp_file(srs_files, tmp_path, monkeypatch):
+    path, mode = srs_files["fast"]
+    cache = tmp_path / "cache"
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(index_cache.os, "replace", fail)
+    _run(path, mode, tmp_path / "out", use_cache=True, cache_dir=str(cache))
+    assert (tmp_path / "out" / "fast.txt").exists()
+    assert os.listdir(cache) == []
+
+
+@pytest.mark.parametrize("options", [dict(), dict(max_memory=64 << 10, pipeline=True), dict(out_format="archive")])
+def test_file_map_closed_after_extraction(srs_files, tmp_path, monkeypatch, options):
+    path, mode = srs_files["fast"]
+    closed = []
+
+    def close(buf):
+        buf.close()  # raises BufferError while any view of the map is still alive
+        closed.append(buf.closed)
+
+    monkeypatch.setattr(extract_core, "close_srs", close)
+    _run(path, mode, tmp_path, **options)
+    assert closed == [True]
+
+
+def test_frame_selection(srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    time, _, spectra = naive_extract(path, mode)
+    _run(path, mode, tmp_path / "a", out_format="npy", frames=slice(10, -20), stride=3)
+    np.testing.assert_array_equal(_spectra(tmp_path / "a", "fast"), spectra[10:-20:3])
+    _run(path, mode, tmp_path / "b", out_format="npy", time_range=(1.0, 2.0))
+    keep = (time.astype(np.float32) >= 1.0) & (time.astype(np.float32) <= 2.0)
+    np.testing.assert_array_equal(np.load(tmp_path / "b" / "fast_time.npy"), time[keep].astype(np.float32))
+    np.testing.assert_array_equal(_spectra(tmp_path / "b", "fast"), spectra[keep])
+
+
+def test_crop(srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    _, wn, spectra = naive_extract(path, mode)
+    _run(path, mode, tmp_path, out_format="npy", crop=(1000.0, 3000.0))
+    cols = (wn >= 1000.0) & (wn <= 3000.0)
+    np.testing.assert_array_equal(_spectra(tmp_path, "fast"), spectra[:, cols])
+    np.testing.assert_array_equal(np.load(tmp_path / "fast_wavenumber.npy"), wn[cols].astype(np.float32))
+    assert np.load(tmp_path / "fast_bg.npy").shape[1] == cols.sum()
+
+
+@pytest.mark.parametrize("max_memory", [None, 64 << 10])
+def test_coadd_and_time_bin(srs_files, tmp_path, max_memory):
+    path, mode = srs_files["fast"]
+    time, _, spectra = naive_extract(path, mode)
+    _run(path, mode, tmp_path / "c", out_format="npy", coadd=7, max_memory=max_memory)
+    groups = [spectra[i : i + 7] for i in range(0, len(spectra), 7)]
+    expected = np.array([g.mean(axis=0, dtype=np.float64) for g in groups], dtype=np.float32)
+    np.testing.assert_allclose(_spectra(tmp_path / "c", "fast"), expected, rtol=1e-6)
+    _run(path, mode, tmp_path / "t", out_format="npy", time_bin=0.1, max_memory=max_memory)
+    bins = np.floor((time - time[0]) / 0.1)
+    expected = np.array([spectra[bins == b].mean(axis=0, dtype=np.float64) for b in np.unique(bins)], dtype=np.float32)
+    np.testing.assert_allclose(_spectra(tmp_path / "t", "fast"), expected, rtol=1e-6)
+
+
+@pytest.mark.parametrize("kind", ["absorbance", "transmittance"])
+def test_convert(srs_files, tmp_path, kind):
+    path, mode = srs_files["fast"]
+    _, _, spectra = naive_extract(path, mode)
+    _run(path, mode, tmp_path, out_format="npy", convert=kind, bg_ref=1)
+    bg = np.load(tmp_path / "fast_bg.npy")
+    ratio = spectra / bg[1]
+    expected = -np.log10(ratio) if kind == "absorbance" else ratio
+    np.testing.assert_allclose(_spectra(tmp_path, f"fast_{kind}"), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_background_shape(srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    _run(path, mode, tmp_path, out_format="npy")
+    assert np.load(tmp_path / "fast_bg.npy").shape == (3, NPTS)
+
+@pytest.mark.parametrize("options", [dict(time_bin=0), dict(time_bin=-1.0), dict(time_bin=float("nan")), dict(coadd=0),
+                                     dict(coadd=2, time_bin=0.1)])
+def test_invalid_binning_rejected(srs_files, tmp_path, options):
+    path, mode = srs_files["fast"]
+    with pytest.raises(ValueError):
+        _run(path, mode, tmp_path, **options)
+    assert not os.path.exists(tmp_path / "fast.txt")
+
+
+@pytest.mark.parametrize("text", ["0", "-1", "nan"])
+def test_time_bin_argument_rejected(text):
+    from srs_extractor.cli import positive_float
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_float(text)
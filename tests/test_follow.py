@@ -0,0 +1,50 @@
+import threading
+import time
+import pytest
+from srs_extractor.common import FRAME_MARKER_HEX
+from srs_extractor.extract_core import run_extraction
+from srs_extractor.follow import follow_extraction
+from srs_extractor.synthetic import write_synthetic_srs
+
+
+def _grow(data: bytes, path, first: int, step: int = 50000, delay: float = 0.02):
+    # the file starts with the first `first` bytes and grows in `step` byte appends
+    with open(path, "wb") as f:
+        f.write(data[:first])
+
+    def run():
+        for i in range(first, len(data), step):
+            time.sleep(delay)
+            with open(path, "ab") as f:
+                f.write(data[i : i + step])
+
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+@pytest.mark.parametrize("no_time", [False, True])
+def test_follow_young_file_matches_full_run(tmp_path, no_time):
+    full = tmp_path / "full.srs"
+    write_synthetic_srs(str(full), mode="realtime", n_frames=200, npts=256, seed=2)
+    data = bytearray(full.read_bytes())
+    marker = bytes.fromhex(FRAME_MARKER_HEX)
+    first = data.find(marker)
+    if no_time:
+        p = first
+        while p != -1:
+            data[p + 8 : p + 16] = b"--------"
+            p = data.find(marker, p + 1)
+        full.write_bytes(data)
+    # cut just after the first frame: too young for the size-limited background scan
+    young = data.find(marker, first + 1) + 20
+    live = tmp_path / "live" / "full.srs"
+    live.parent.mkdir()
+    writer = _grow(bytes(data), live, young)
+    follow_extraction(str(live), outdir=str(tmp_path / "follow"), poll_interval=0.01, idle_timeout=0.5)
+    writer.join()
+    run_extraction(str(full), mode="realtime", outdir=str(tmp_path / "run"), use_cache=False)
+    for name in ("full.txt", "full_bg.txt"):
+        assert (tmp_path / "follow" / name).read_bytes() == (tmp_path / "run" / name).read_bytes()
+    header = (tmp_path / "follow" / "full.txt").read_text().split("\n", 1)[0]
+    assert header.startswith("\t") != no_time
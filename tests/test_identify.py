@@ -0,0 +1,37 @@
+import sys
+import pytest
+from srs_extractor import cli
+from srs_extractor.extract_core import run_extraction
+from srs_extractor.file_identify import guess_srs_type, identify_srs_type
+from srs_extractor.common import FRAME_MARKER_HEX
+
+
+@pytest.mark.parametrize("name", ["fast", "realtime", "jitter"])
+def test_identify_synthetic_files(srs_files, name):
+    path, mode = srs_files[name]
+    assert guess_srs_type(path) == mode
+    _, reasons = identify_srs_type(open(path, "rb").read())
+    assert any("最短帧间距" in r and r.endswith(mode) for r in reasons)
+
+
+@pytest.mark.parametrize("name", ["fast", "realtime"])
+def test_identify_without_background_block(srs_files, name):
+    # only the header and the frames: no background markers and no pseudo-frame #0
+    path, mode = srs_files[name]
+    srs = open(path, "rb").read()
+    marker = bytes.fromhex(FRAME_MARKER_HEX)
+    frames = srs.find(marker, srs.find(marker) + 1) if mode == "fast" else srs.find(marker)
+    found, reasons = identify_srs_type(srs[:1024] + srs[frames:])
+    assert found == mode
+    assert not any("背景标记" in r or "伪帧" in r for r in reasons)
+
+
+@pytest.mark.parametrize("name", ["fast", "realtime"])
+def test_cli_mode_auto_matches_explicit_mode(srs_files, tmp_path, monkeypatch, name):
+    path, mode = srs_files[name]
+    run_extraction(path, mode=mode, outdir=str(tmp_path / "explicit"), use_cache=False)
+    monkeypatch.setattr(sys, "argv", ["cli", path, "--mode", "auto", "--outdir", str(tmp_path / "auto"), "--no-cache"])
+    cli.main()
+    for suffix in (".txt", "_bg.txt"):
+        out = f"{name}{suffix}"
+        assert (tmp_path / "auto" / out).read_bytes() == (tmp_path / "explicit" / out).read_bytes()
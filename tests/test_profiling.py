@@ -0,0 +1,15 @@
+import json
+from srs_extractor.extract_core import run_extraction
+
+
+def test_profile_report_with_frame_selection(srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    report = tmp_path / "profile.json"
+    written = run_extraction(path, mode=mode, outdir=str(tmp_path), use_cache=False, frames=slice(0, 10),
+                             time_range=(0.0, 1.0), crop=(1000.0, 3000.0), profile=str(report))
+    assert written is not None
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["meta"]["options"]["frames"] == [0, 10]
+    assert data["meta"]["options"]["time_range"] == [0.0, 1.0]
+    assert data["meta"]["completed"] is True
+    assert {s["name"] for s in data["stages"]} >= {"marker_scan", "time_axis", "spectra_matrix", "timeseries_write"}
@@ -0,0 +1,133 @@
+import json
+import os
+import socket
+import threading
+import time
+import pytest
+from srs_extractor import service
+
+
+def test_default_address_without_getuid(monkeypatch):
+    monkeypatch.setattr(socket, "AF_UNIX", 1, raising=False)
+    monkeypatch.delattr(os, "getuid", raising=False)
+    assert service.default_address() == ("127.0.0.1", service.DEFAULT_PORT)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX") or not hasattr(os, "getuid"), reason="needs Unix sockets")
+def test_default_address_unix_socket():
+    address = service.default_address()
+    assert isinstance(address, str) and address.endswith(f"srs_extractor-{os.getuid()}.sock")
+
+
+def test_job_options_have_no_paths_outside_outdir():
+    for key in ("profile", "cprofile", "cache_dir"):
+        with pytest.raises(ValueError, match="unknown job options"):
+            service.job_options({"cmd": "submit", "path": "x.srs", key: "/tmp/elsewhere"})
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(params=["unix", "tcp"])
+def running(request, tmp_path, monkeypatch):
+    """A service on a temporary Unix socket or localhost port; yields its address."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    if request.param == "unix":
+        if not hasattr(socket, "AF_UNIX"):
+            pytest.skip("needs Unix sockets")
+        address = str(tmp_path / "s.sock")
+    else:
+        address = ("127.0.0.1", _free_port())
+    thread = threading.Thread(target=service.serve, args=(address, 1), daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while True:
+        try:
+            if service.request({"cmd": "ping"}, address, timeout=5)["ok"]:
+                break
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+    yield address
+    try:
+        service.request({"cmd": "shutdown"}, address, timeout=30)
+    except OSError:
+        pass  # already shut down by the test
+    thread.join(30)
+    assert not thread.is_alive()
+
+
+def _connect(address):
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(30)
+    sock.connect(address)
+    return sock, sock.makefile("rb")
+
+
+def test_submit_wait_status_shutdown(running, srs_files, tmp_path):
+    path, mode = srs_files["fast"]
+    out = tmp_path / "out"
+    job = service.request({"cmd": "submit", "path": path, "mode": "auto", "outdir": str(out), "use_cache": False,
+                           "wait": True, "timeout": 60}, running)["job"]
+    assert job["status"] == "done", job
+    assert sorted(os.path.basename(p) for p in job["written"]) == ["fast.txt", "fast_bg.txt"]
+    assert job["total_seconds"] >= job["run_seconds"] > 0
+
+    job = service.request({"cmd": "submit", "path": path, "mode": mode, "outdir": str(out), "out_format": "npy",
+                           "coadd": 3, "frames": "10:-10"}, running)["job"]
+    assert job["status"] in ("queued", "running", "done")
+    job = service.request({"cmd": "wait", "job": job["id"], "timeout": 60}, running)["job"]
+    assert job["status"] == "done", job
+    assert service.request({"cmd": "status", "job": job["id"]}, running)["job"]["status"] == "done"
+    assert [j["id"] for j in service.request({"cmd": "list"}, running)["jobs"]] == [1, 2]
+
+    failed = service.request({"cmd": "submit", "path": path, "outdir": str(out), "coadd": 2, "time_bin": 0.1,
+                              "wait": True}, running)["job"]
+    assert failed["status"] == "failed" and "ValueError" in failed["error"]
+    for bad in ({"cmd": "submit", "path": path, "profile": str(tmp_path / "p.json")},
+                {"cmd": "status", "job": 99}, {"cmd": "nope"}):
+        assert not service.request(bad, running)["ok"]
+    assert not (tmp_path / "p.json").exists()
+
+    tokens = service.token_path(running)
+    assert os.path.exists(tokens)
+    assert service.request({"cmd": "shutdown"}, running)["ok"]
+    deadline = time.time() + 30
+    while os.path.exists(tokens) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not os.path.exists(tokens)
+    if isinstance(running, str):
+        assert not os.path.exists(running)
+
+
+def test_malformed_lines_get_error_replies(running):
+    sock, replies = _connect(running)
+    with sock, replies:
+        token = service.read_token(running)
+        for line in (b"not json\n", b"[1, 2]\n", b"POST / HTTP/1.1\r\n"):
+            sock.sendall(line)
+            reply = json.loads(replies.readline())
+            assert not reply["ok"] and reply["error"].startswith("bad request")
+        # the connection stays usable for well-formed requests
+        sock.sendall(json.dumps({"cmd": "ping", "token": token}).encode() + b"\n")
+        assert json.loads(replies.readline())["ok"]
+
+
+@pytest.mark.parametrize("token", [None, "0" * 64])
+def test_requests_without_the_token_are_refused(running, srs_files, tmp_path, token):
+    path, _ = srs_files["fast"]
+    sock, replies = _connect(running)
+    with sock, replies:
+        message = {"cmd": "submit", "path": path, "outdir": str(tmp_path / "x")}
+        if token is not None:
+            message["token"] = token
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        assert json.loads(replies.readline()) == {"ok": False, "error": "unauthorized"}
+        assert replies.readline() == b""  # connection closed
+    assert service.request({"cmd": "list"}, running)["jobs"] == []
+    assert not (tmp_path / "x").exists()
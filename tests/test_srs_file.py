@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pytest
+from srs_extractor import SrsFile
+from srs_extractor.extract_core import run_extraction
+from .conftest import N_FRAMES, NPTS, naive_extract
+
+
+@pytest.fixture(params=["fast", "realtime"])
+def opened(request, srs_files):
+    path, mode = srs_files[request.param]
+    with SrsFile(path, mode=mode, use_cache=False) as f:
+        yield f, naive_extract(path, mode)
+
+
+def test_frames_and_time_axis(opened):
+    f, (time, wn, spectra) = opened
+    assert (f.n_frames, f.npts) == (N_FRAMES, NPTS) == f.spectra.shape
+    np.testing.assert_array_equal(f.time_axis, time)
+    np.testing.assert_array_equal(f.wavenumbers, wn)
+    for i in (0, 17, N_FRAMES - 1, -1, -N_FRAMES):
+        np.testing.assert_array_equal(f.frame(i), spectra[i])
+    for i in (N_FRAMES, -N_FRAMES - 1):
+        with pytest.raises(IndexError):
+            f.frame(i)
+
+
+@pytest.mark.parametrize("key", [
+    slice(100, 150),
+    slice(None, None, -7),
+    slice(290, 400),
+    [5, 3, 250, 3, -1],
+    (slice(10, 20), slice(30, 40)),
+    (slice(None), slice(None, None, 5)),
+    (42, slice(100, 120)),
+    (-3,),
+    7,
+])
+def test_spectra_indexing(opened, key):
+    f, (_, _, spectra) = opened
+    if isinstance(key, list):
+        key = np.array(key)
+    np.testing.assert_array_equal(f.spectra[key], spectra[key])
+
+
+def test_boolean_mask_and_selection(opened):
+    f, (time, _, spectra) = opened
+    mask = spectra[:, 0] > np.median(spectra[:, 0])
+    np.testing.assert_array_equal(f.spectra[mask], spectra[mask])
+    rows = f.select(time_range=(1.0, 2.0))
+    np.testing.assert_array_equal(f.spectra[rows], spectra[(time >= 1.0) & (time <= 2.0)])
+    np.testing.assert_array_equal(np.asarray(f.spectra), spectra)
+    with pytest.raises(IndexError):
+        f.spectra[0, 1, 2]
+
+
+def test_background_matches_extraction(opened, tmp_path):
+    f, _ = opened
+    run_extraction(f.path, mode=f.mode, outdir=str(tmp_path), out_format="npy", use_cache=False)
+    name = os.path.splitext(os.path.basename(f.path))[0]
+    np.testing.assert_array_equal(f.background, np.load(tmp_path / f"{name}_bg.npy"))
+
+
+def test_context_manager_closes_the_map(srs_files):
+    path, mode = srs_files["realtime"]
+    with SrsFile(path, mode="auto") as f:
+        assert f.mode == mode
+        raw = f.raw
+        block = f.spectra[:10]
+        assert not raw.closed
+    assert raw.closed
+    # decoded frames are copies and outlive the map; the file is remapped on next use
+    np.testing.assert_array_equal(block, naive_extract(path, mode)[2][:10])
+    np.testing.assert_array_equal(f.frame(3), block[3])
+    f.close()
@@ -0,0 +1,88 @@
+import json
+import numpy as np
+import pytest
+from srs_extractor import SrsFile
+from srs_extractor.common import FRAME_MARKER_HEX
+from srs_extractor.extract_core import run_extraction
+from .conftest import N_FRAMES, NPTS
+
+NAN_FRAMES = [10, 57]
+INF_FRAMES = [20]
+FLAT_FRAMES = [30, 31]
+SHORT_FRAMES = [40, 250]
+BAD = sorted(NAN_FRAMES + INF_FRAMES + FLAT_FRAMES + SHORT_FRAMES)
+
+
+@pytest.fixture(scope="module")
+def damaged(srs_files, tmp_path_factory):
+    """The fast file with NaN/Inf, flat and short (10 points cut) frames; returns (path, time, spectra)."""
+    src, _ = srs_files["fast"]
+    srs = bytearray(open(src, "rb").read())
+    marker = bytes.fromhex(FRAME_MARKER_HEX)
+    pos, p = [], srs.find(marker)
+    while p != -1:
+        pos.append(p)
+        p = srs.find(marker, p + 1)
+    frames = pos[1:-1]  # after pseudo-frame #0, before the closing marker
+    time = np.array([float(srs[a + 8 : a + 16]) for a in frames])
+    spectra = np.array([np.frombuffer(srs, dtype="<f4", count=NPTS, offset=a + 80) for a in frames])
+    for i in NAN_FRAMES:
+        spectra[i, 5:9] = np.nan
+    for i in INF_FRAMES:
+        spectra[i, 100] = -np.inf
+    for i in FLAT_FRAMES:
+        spectra[i] = 0.25
+    for i in range(N_FRAMES):
+        srs[frames[i] + 80 : frames[i] + 80 + 4 * NPTS] = spectra[i].astype("<f4").tobytes()
+    for i in sorted(SHORT_FRAMES, reverse=True):
+        cut = frames[i] + 80 + 4 * (NPTS - 10)
+        del srs[cut : cut + 40]
+    path = tmp_path_factory.mktemp("damaged") / "damaged.srs"
+    path.write_bytes(bytes(srs))
+    return str(path), time, spectra
+
+
+def test_report_flags_injected_frames(damaged, tmp_path):
+    path, _, _ = damaged
+    with SrsFile(path, mode="fast", use_cache=False) as f:
+        report, bad = f.validate()
+    assert report["lengths"]["short_frame_indices"] == SHORT_FRAMES
+    assert report["lengths"]["npts"] == NPTS - 10 and report["lengths"]["modal_npts"] == NPTS
+    assert report["content"]["nonfinite_indices"] == sorted(NAN_FRAMES + INF_FRAMES)
+    assert report["content"]["nan_values"] == 4 * len(NAN_FRAMES) and report["content"]["inf_values"] == 1
+    assert report["content"]["flat_indices"] == FLAT_FRAMES
+    assert report["time"]["monotonic"] and report["time"]["nan"] == 0
+    # bad = content problems; short frames are only reported by the length check
+    assert np.flatnonzero(bad).tolist() == sorted(NAN_FRAMES + INF_FRAMES + FLAT_FRAMES)
+
+    run_extraction(path, mode="fast", outdir=str(tmp_path), out_format="npy", validate=True, use_cache=False)
+    with open(tmp_path / "damaged_validation.json", encoding="utf-8") as fh:
+        written = json.load(fh)
+    assert written["lengths"] == report["lengths"] and written["content"] == report["content"]
+    assert "dropped_frames" not in written
+    assert np.load(tmp_path / "damaged_spectra.npy").shape == (N_FRAMES, NPTS - 10)
+
+
+@pytest.mark.parametrize("options", [dict(), dict(max_memory=64 << 10), dict(pipeline=True, max_memory=64 << 10)])
+def test_drop_bad_leaves_out_exactly_the_flagged_frames(damaged, tmp_path, options):
+    path, time, spectra = damaged
+    keep = np.setdiff1d(np.arange(N_FRAMES), BAD)
+    run_extraction(path, mode="fast", outdir=str(tmp_path), out_format="npy", drop_bad=True, use_cache=False,
+                   **options)
+    np.testing.assert_array_equal(np.load(tmp_path / "damaged_spectra.npy"), spectra[keep])
+    np.testing.assert_array_equal(np.load(tmp_path / "damaged_time.npy"), time[keep].astype(np.float32))
+    with open(tmp_path / "damaged_validation.json", encoding="utf-8") as fh:
+        assert json.load(fh)["dropped_frames"] == len(BAD)
+
+
+@pytest.mark.parametrize("max_memory", [None, 64 << 10])
+def test_drop_bad_then_coadd(damaged, tmp_path, max_memory):
+    path, _, spectra = damaged
+    kept = spectra[np.setdiff1d(np.arange(N_FRAMES), BAD)]
+    run_extraction(path, mode="fast", outdir=str(tmp_path), out_format="npy", drop_bad=True, coadd=4,
+                   max_memory=max_memory, use_cache=False)
+    expected = np.array([kept[i : i + 4].mean(axis=0, dtype=np.float64) for i in range(0, len(kept), 4)],
+                        dtype=np.float32)
+    out = np.load(tmp_path / "damaged_spectra.npy")
+    assert np.isfinite(out).all()
+    np.testing.assert_allclose(out, expected, rtol=1e-6)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from srs_extractor.writers import RowStream, _format_float32, write_npy_arrays, write_text_batches, write_text_matrix
+
+
+def _random_bits(rng, max_exp=254):
+    # float32 bit patterns with biased exponent <= max_exp (255 is inf/nan)
+    bits = rng.integers(0, 2**32, 4000, dtype=np.uint64).astype(np.uint32)
+    exp = (bits >> 23) & 0xFF
+    return bits[exp <= max_exp].view(np.float32)
+
+
+def _as_rows(values):
+    return values[: len(values) // 7 * 7].reshape(-1, 7)
+
+
+def _fast_path_values(rng, precision):
+    # everything below 10**precision, subnormals included, has an exact vectorized path
+    max_exp = 127 + int(np.floor(precision * np.log2(10)))
+    edge = np.array([0.0, -0.0, 1.0, -1.0, 0.1, 1e-45, -1e-45, 1.1754942e-38, 1.1754944e-38,
+                     9.999999e-5, 1e-4, 0.5, 0.25, 9.5, -2.5], dtype=np.float32)
+    return _as_rows(np.concatenate([_random_bits(rng, max_exp), edge, rng.standard_normal(1000).astype(np.float32)]))
+
+
+def _assert_matches_savetxt(tmp_path, values, precision):
+    first = np.linspace(-1, 1, len(values))
+    ours, ref = tmp_path / "ours.txt", tmp_path / "ref.txt"
+    write_text_matrix(str(ours), values, "h", first_col=first, precision=precision)
+    np.savetxt(ref, np.column_stack([first, values.astype(np.float64)]), fmt=f"%.{precision}e",
+               delimiter="\t", header="h", comments="")
+    assert ours.read_bytes() == ref.read_bytes()
+
+
+@pytest.mark.parametrize("precision", [18, 12, 9, 6, 3, 1, 0])
+def test_float32_formatter_matches_savetxt(tmp_path, precision):
+    values = _fast_path_values(np.random.default_rng(precision), precision)
+    assert _format_float32(values.ravel(), precision, b"\t", values.shape[1]) is not None
+    _assert_matches_savetxt(tmp_path, values, precision)
+
+
+def test_generic_path_matches_savetxt(tmp_path):
+    values = _as_rows(np.concatenate([_random_bits(np.random.default_rng(1)),
+                                      np.array([3.4028235e38, -1e30], dtype=np.float32)]))
+    _assert_matches_savetxt(tmp_path, values, 18)
+
+
+def test_non_finite_values_match_savetxt(tmp_path):
+    values = np.array([[np.inf, -np.inf, np.nan], [1.5, -0.0, 3.4028235e38]], dtype=np.float32)
+    _assert_matches_savetxt(tmp_path, values, 18)
+
+
+@pytest.mark.parametrize("workers,chunk_rows", [(0, 1), (0, 7), (3, 5)])
+def test_batches_and_threads_match_whole_matrix(tmp_path, workers, chunk_rows):
+    m = np.random.default_rng(0).standard_normal((101, 9)).astype(np.float32)
+    whole, batched = tmp_path / "whole.txt", tmp_path / "batched.txt"
+    write_text_matrix(str(whole), m, "h")
+    write_text_batches(str(batched), (m[i : i + 13] for i in range(0, len(m), 13)), "h",
+                       chunk_rows=chunk_rows, workers=workers)
+    assert whole.read_bytes() == batched.read_bytes()
+
+
+def test_npy_row_stream_matches_np_save(tmp_path):
+    m = np.random.default_rng(0).standard_normal((50, 4)).astype(np.float32)
+    (path,) = write_npy_arrays(str(tmp_path), "x", {"spectra": RowStream(m.shape, iter([m[:20], m[20:]]))})
+    np.save(tmp_path / "ref.npy", m)
+    assert open(path, "rb").read() == (tmp_path / "ref.npy").read_bytes()